@@ -23,13 +23,18 @@ Simula el modelo relacional uniéndolas en memoria para:
 import sys
 
 try:
+    from concurrent.futures import ThreadPoolExecutor
     from pathlib import Path
-    from typing import Dict, List, Tuple
+    from typing import Dict, FrozenSet, List, Tuple
 
+    import hashlib
     import os
     import altair as alt
     import numpy as np
     import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
     import streamlit as st
     import google.generativeai as genai
     from dotenv import load_dotenv
@@ -59,44 +64,114 @@ st.set_page_config(
 )
 
 DATA_DIR = Path("data/gold/dashboard")
+CACHE_DIR = Path("data/cache")
+
+# Versión del formato del caché del modelo integrado (data/cache): súbala al
+# cambiar load_base_tables / build_integrated_df (columnas, tipos, orden) para
+# que no se lea un .feather generado por el código anterior
+INTEGRATED_CACHE_VERSION = 1
+
+BASE_TABLE_FILES = {
+    "metas": "metas.parquet",
+    "mandatos": "mandatos.parquet",
+    "poblacion": "poblacion_santander.parquet",
+    "policia": "policia_santander.parquet",
+    "municipios": "municipios.parquet",
+    "delitos_bucaramanga": "delitos_bucaramanga.parquet",
+    "delitos_informaticos": "delitos_informaticos.parquet",
+}
 
 
 # ============================================================
 # 1. Carga de datos y construcción del modelo integrado
 # ============================================================
 
+def source_mtimes() -> Tuple[float, ...]:
+    """
+    Fechas de modificación de las tablas base.
+
+    Se usan como clave de caché: si algún parquet cambia en disco,
+    las tablas y el modelo integrado se reconstruyen.
+    """
+    return tuple(
+        (DATA_DIR / fname).stat().st_mtime for fname in BASE_TABLE_FILES.values()
+    )
+
+
+def downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce in-place las columnas enteras al tipo más pequeño que las contiene.
+
+    Años, meses, códigos DANE, banderas y población caben en int8–int32;
+    con menos bytes por fila los merges, groupby y máscaras mueven menos
+    memoria. Los flotantes no se tocan: en float32 las sumas de casos y
+    las tasas perderían precisión.
+    """
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def read_fact_table(path: Path) -> pd.DataFrame:
+    """
+    Lee una tabla de hechos con `cantidad` ya tipada.
+
+    El cast a float64 y el relleno de nulos con 0 se hacen en Arrow sobre
+    la columna leída, antes de pasar a pandas.
+    """
+    table = pq.read_table(path)
+    idx = table.schema.get_field_index("cantidad")
+    if idx >= 0:
+        cantidad = pc.fill_null(table.column(idx).cast(pa.float64()), 0.0)
+        table = table.set_column(idx, "cantidad", cantidad)
+    return table.to_pandas()
+
+
+FACT_TABLES = ("policia", "delitos_bucaramanga", "delitos_informaticos")
+
+
+def read_base_table(name: str) -> pd.DataFrame:
+    """Lee una tabla base por nombre lógico, con columnas y enteros normalizados."""
+    path = DATA_DIR / BASE_TABLE_FILES[name]
+    df = read_fact_table(path) if name in FACT_TABLES else pd.read_parquet(path)
+
+    # Normalizar nombres de columnas (quitar espacios) y tipos enteros
+    df.columns = [c.strip() for c in df.columns]
+    return downcast_integers(df)
+
+
 @st.cache_data(show_spinner=True)
-def load_base_tables() -> Dict[str, pd.DataFrame]:
-    """Carga las tablas base del dashboard desde data/gold/dashboard."""
-    metas = pd.read_parquet(DATA_DIR / "metas.parquet")
-    mandatos = pd.read_parquet(DATA_DIR / "mandatos.parquet")
-    poblacion = pd.read_parquet(DATA_DIR / "poblacion_santander.parquet")
-    policia = pd.read_parquet(DATA_DIR / "policia_santander.parquet")
-    municipios = pd.read_parquet(DATA_DIR / "municipios.parquet")
-    delitos_bucaramanga = pd.read_parquet(DATA_DIR / "delitos_bucaramanga.parquet")
-    delitos_informaticos = pd.read_parquet(DATA_DIR / "delitos_informaticos.parquet")
-
-    # Normalizar nombres de columnas (quitar espacios)
-    for df in (
-        metas,
-        mandatos,
-        poblacion,
-        policia,
-        municipios,
-        delitos_bucaramanga,
-        delitos_informaticos,
-    ):
-        df.columns = [c.strip() for c in df.columns]
+def load_base_tables(mtimes: Tuple[float, ...]) -> Dict[str, pd.DataFrame]:
+    """
+    Carga las tablas base del dashboard desde data/gold/dashboard.
 
-    return {
-        "metas": metas,
-        "mandatos": mandatos,
-        "poblacion": poblacion,
-        "policia": policia,
-        "municipios": municipios,
-        "delitos_bucaramanga": delitos_bucaramanga,
-        "delitos_informaticos": delitos_informaticos,
-    }
+    Las lecturas van en paralelo con un pool de hilos: Arrow libera el GIL
+    mientras lee y decodifica parquet, así que la carga en frío tarda lo
+    que el archivo más lento. `mtimes` (ver source_mtimes) solo se usa
+    como clave de caché.
+    """
+    with ThreadPoolExecutor(max_workers=len(BASE_TABLE_FILES)) as executor:
+        tables = executor.map(read_base_table, BASE_TABLE_FILES)
+        return dict(zip(BASE_TABLE_FILES, tables))
+
+
+def upper_category(series: pd.Series) -> pd.Series:
+    """
+    Equivale a `series.astype(str).str.upper().astype("category")`.
+
+    Solo se pasan a mayúsculas los valores distintos (con el kernel UTF-8
+    de Arrow); las filas se reconstruyen a partir de los códigos enteros.
+    Los valores que coinciden tras el cambio se funden en una categoría y
+    los nulos (None o NaN) quedan todos como "NAN".
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    upper = pc.utf8_upper(pa.array(pd.Index(uniques).astype(str), type=pa.string()))
+    new_codes, categories = pd.factorize(upper.to_numpy(zero_copy_only=False), sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes[codes], categories=categories),
+        index=series.index,
+        name=series.name,
+    )
 
 
 def build_integrated_df(
@@ -123,10 +198,11 @@ def build_integrated_df(
         + mandatos
         + metas
     """
-    # Copias de trabajo
-    df_pol = policia.copy()
-    df_buc = delitos_bucaramanga.copy()
-    df_inf = delitos_informaticos.copy()
+    # load_base_tables (st.cache_data) entrega copias propias en cada
+    # llamada: se trabaja directamente sobre ellas, sin duplicarlas.
+    df_pol = policia
+    df_buc = delitos_bucaramanga
+    df_inf = delitos_informaticos
 
     # ---------------------------
     # Alinear columnas clave
@@ -136,10 +212,7 @@ def build_integrated_df(
     if "edad" in df_buc.columns and "edad_persona" not in df_buc.columns:
         df_buc = df_buc.rename(columns={"edad": "edad_persona"})
 
-    # Asegurar cantidad numérica
-    for df_src in (df_pol, df_buc, df_inf):
-        if "cantidad" in df_src.columns:
-            df_src["cantidad"] = pd.to_numeric(df_src["cantidad"], errors="coerce").fillna(0)
+    # cantidad ya llega como float64 sin nulos (ver read_fact_table)
 
     # Delitos informáticos no traen columna "delito" en el modelo,
     # creamos un identificador genérico para integrarlos.
@@ -160,11 +233,37 @@ def build_integrated_df(
 
     # Limpieza básica de nombres antes de joins
     fact.columns = [c.strip() for c in fact.columns]
+    fact["origen"] = fact["origen"].astype("category")
 
     # Eliminamos columnas espaciales que vendrán de municipios
-    for col in ["departamento", "municipio", "codigo_departamento"]:
-        if col in fact.columns:
-            fact = fact.drop(columns=col)
+    # (un solo drop: cada drop materializa una copia completa)
+    fact = fact.drop(
+        columns=[
+            c
+            for c in ["departamento", "municipio", "codigo_departamento"]
+            if c in fact.columns
+        ]
+    )
+
+    # ---------------------------
+    # Tipos básicos
+    # ---------------------------
+    # Se normalizan antes de los joins: el join con población replica
+    # cada hecho por grupo demográfico, así que aquí hay menos filas.
+    fact["anio"] = pd.to_numeric(fact["anio"], errors="coerce").astype("Int32")
+    fact["mes"] = pd.to_numeric(fact["mes"], errors="coerce").astype("Int32")
+    fact["dia"] = pd.to_numeric(fact["dia"], errors="coerce").astype("Int32")
+
+    # delito y municipio se guardan como categóricas: ocupan menos memoria
+    # y los groupby / isin del dashboard operan sobre códigos enteros.
+    fact["delito"] = upper_category(fact["delito"])
+
+    # ---------------------------
+    # Dimensión anual (mandatos + metas)
+    # ---------------------------
+    # Se une primero entre tablas pequeñas (un registro por año) para
+    # hacer un solo merge contra la tabla de hechos en lugar de dos.
+    dim_anio = mandatos.merge(metas, on="mandato", how="left")
 
     # ---------------------------
     # Join dimensión espacial (municipios)
@@ -181,6 +280,7 @@ def build_integrated_df(
         on="codigo_municipio",
         how="left",
     )
+    fact["municipio"] = upper_category(fact["municipio"])
 
     # ---------------------------
     # Join población (para tasas)
@@ -194,78 +294,311 @@ def build_integrated_df(
     # ---------------------------
     # Join mandatos y metas
     # ---------------------------
-    fact = fact.merge(mandatos, on="anio", how="left")  # agrega "mandato"
-    fact = fact.merge(metas, on="mandato", how="left")  # agrega metas y presupuesto
+    fact = fact.merge(dim_anio, on="anio", how="left")  # agrega mandato, metas y presupuesto
 
     # ---------------------------
-    # Tipos básicos y tasas
+    # Tasas
     # ---------------------------
-    fact["anio"] = pd.to_numeric(fact["anio"], errors="coerce").astype("Int64")
-    fact["mes"] = pd.to_numeric(fact["mes"], errors="coerce").astype("Int64")
-    fact["dia"] = pd.to_numeric(fact["dia"], errors="coerce").astype("Int64")
-
-    fact["delito"] = fact["delito"].astype(str).str.upper()
-    fact["municipio"] = fact["municipio"].astype(str).str.upper()
-
-    # Tasa por 100.000 habitantes (cuando hay población)
-    fact["tasa_100k"] = np.where(
-        fact["n_poblacion"] > 0,
-        fact["cantidad"] / fact["n_poblacion"] * 1e5,
-        np.nan,
+    # Tasa por 100.000 habitantes (cuando hay población).
+    # División in-place sobre un único arreglo de salida: solo se divide
+    # donde hay población y el resto queda en NaN.
+    pob = fact["n_poblacion"].to_numpy(dtype=np.float64, na_value=np.nan)
+    cant = fact["cantidad"].to_numpy(dtype=np.float64)
+    tasa = np.full(len(fact), np.nan)
+    np.divide(cant, pob, out=tasa, where=pob > 0)
+    tasa *= 1e5
+    fact["tasa_100k"] = tasa
+
+    # Orden físico por (anio, municipio, delito): los filtros por rango de
+    # años se vuelven cortes contiguos (ver year_slice)
+    fact = fact.sort_values(
+        ["anio", "municipio", "delito"],
+        kind="stable",
+        na_position="last",
+        ignore_index=True,
     )
 
     return fact
 
 
+def integrated_cache_path(mtimes: Tuple[float, ...]) -> Path:
+    """
+    Ruta del caché en disco del modelo integrado para estas versiones de las
+    tablas y de INTEGRATED_CACHE_VERSION.
+    """
+    signature = f"v{INTEGRATED_CACHE_VERSION}|" + "|".join(
+        f"{fname}:{mtime}" for fname, mtime in zip(BASE_TABLE_FILES.values(), mtimes)
+    )
+    key = hashlib.md5(signature.encode()).hexdigest()[:12]
+    return CACHE_DIR / f"integrated_{key}.feather"
+
+
+@st.cache_data(show_spinner=False)
+def load_mandatos(mtimes: Tuple[float, ...]) -> pd.DataFrame:
+    """Tabla de mandatos (años del selector), sin cargar las demás tablas base."""
+    mandatos = pd.read_parquet(DATA_DIR / BASE_TABLE_FILES["mandatos"])
+    mandatos.columns = [c.strip() for c in mandatos.columns]
+    return downcast_integers(mandatos)
+
+
+@st.cache_resource(show_spinner="Integrando fuentes...")
+def load_integrated_df(mtimes: Tuple[float, ...]) -> pd.DataFrame:
+    """
+    Construye el DataFrame integrado una sola vez por proceso.
+
+    Streamlit re-ejecuta el script completo en cada interacción; con
+    cache_resource el modelo integrado se reutiliza entre reruns (sin
+    copiarlo) y solo se reconstruye cuando cambian las tablas base.
+    El DataFrame devuelto se comparte, así que no debe modificarse.
+
+    Además se persiste en data/cache como Feather (LZ4): un proceso nuevo
+    (reinicio, redeploy) lo lee directamente en lugar de repetir lecturas
+    y merges. Al reconstruir se eliminan los archivos de versiones viejas.
+    El archivo se escribe en un temporal que se renombra al terminar, y uno
+    ilegible (p. ej. truncado) se descarta y se reconstruye.
+    """
+    cache_path = integrated_cache_path(mtimes)
+    if cache_path.exists():
+        try:
+            return pd.read_feather(cache_path)
+        except (OSError, pa.ArrowInvalid) as exc:
+            print(f"DEBUG: Caché ilegible {cache_path}, se reconstruye: {exc}")
+            cache_path.unlink(missing_ok=True)
+
+    data = load_base_tables(mtimes)
+    fact = build_integrated_df(**data)
+
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in CACHE_DIR.glob("integrated_*.feather"):
+            stale.unlink()
+        fact.to_feather(tmp_path, compression="lz4")
+        tmp_path.replace(cache_path)
+    except (OSError, ValueError, pa.ArrowException) as exc:
+        # El caché en disco es opcional: sin permisos de escritura o si la
+        # serialización falla se sigue con el DataFrame en memoria
+        print(f"DEBUG: No se pudo escribir el caché {cache_path}: {exc}")
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    return fact
+
+
+META_COLUMNS = ["meta_homicidios", "meta_hurtos", "meta_lesiones"]
+
+
+@st.cache_data(show_spinner=False)
+def build_cube(_fact: pd.DataFrame, cache_key: Tuple[float, ...]) -> pd.DataFrame:
+    """
+    Cubo (anio, mes, municipio, delito) pre-agregado del modelo integrado.
+
+    Todas las vistas del dashboard son sumas sobre estas claves, así que
+    filtrar y agrupar el cubo da los mismos resultados que la tabla de
+    hechos tocando muchas menos filas. n_poblacion se suma (no se toma el
+    primero) para conservar los totales que ya mostraban los KPIs; las
+    metas dependen solo del año y se toma su primer valor. El groupby
+    devuelve las claves ordenadas, con anio primero (nulos al final), lo
+    que permite usar year_slice sobre el cubo.
+    """
+    agg = {
+        "cantidad": ("cantidad", "sum"),
+        "n_poblacion": ("n_poblacion", "sum"),
+    }
+    for col in META_COLUMNS:
+        if col in _fact.columns:
+            agg[col] = (col, "first")
+
+    return _fact.groupby(
+        ["anio", "mes", "codigo_municipio", "municipio", "delito"],
+        observed=True,
+        dropna=False,
+        as_index=False,
+    ).agg(**agg)
+
+
+@st.cache_data(show_spinner=False)
+def yearly_uniques(
+    _cube: pd.DataFrame,
+    cache_key: Tuple[float, ...],
+) -> Dict[int, Tuple[FrozenSet[str], FrozenSet[str]]]:
+    """
+    Municipios y delitos presentes en cada año (opciones del sidebar).
+
+    Las listas de un rango de años se arman uniendo estos conjuntos
+    pequeños, sin volver a recorrer los datos en cada rerun.
+    `_cube` no se hashea; `cache_key` identifica la versión de los datos.
+    """
+    return {
+        int(anio): (
+            frozenset(grp["municipio"].dropna()),
+            frozenset(grp["delito"].dropna()),
+        )
+        for anio, grp in _cube.groupby("anio", observed=True, sort=False)
+    }
+
+
+@st.cache_data(show_spinner=False)
+def mandato_by_year(
+    _mandatos: pd.DataFrame,
+    cache_key: Tuple[float, ...],
+) -> Tuple[int, np.ndarray]:
+    """
+    Mandato de cada año como arreglo indexado por `anio - year_min`.
+
+    El texto de mandatos de un rango se arma con un slice de este arreglo
+    en lugar de filtrar la tabla en cada rerun. Años sin mandato quedan
+    como None.
+    """
+    by_year = (
+        _mandatos.dropna(subset=["anio"])
+        .drop_duplicates("anio")
+        .set_index("anio")["mandato"]
+    )
+    year_min = int(by_year.index.min())
+    year_max = int(by_year.index.max())
+    lookup = (
+        by_year.reindex(range(year_min, year_max + 1))
+        .astype(object)
+        .where(lambda s: s.notna(), None)
+        .to_numpy()
+    )
+    return year_min, lookup
+
+
 # ============================================================
-# 2. Helpers genéricos (normalización y agregaciones)
+# 2. Helpers genéricos (agregaciones)
 # ============================================================
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normaliza nombres de columnas (strip) y retorna copia."""
-    df = df.copy()
-    df.columns = [c.strip() for c in df.columns]
-    return df
+def category_mask(series: pd.Series, selected: List[str]) -> np.ndarray:
+    """
+    Equivalente a series.isin(selected) para columnas categóricas.
+
+    Marca las categorías seleccionadas en una tabla booleana indexada por
+    código y la aplica con un solo indexado sobre el arreglo de códigos
+    (int8/int16). La posición extra al final de la tabla queda en False y
+    absorbe el código -1 de los nulos.
+    """
+    categories = series.cat.categories
+    selected_codes = categories.get_indexer(selected)
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    lookup[selected_codes[selected_codes >= 0]] = True
+    return lookup[series.cat.codes.to_numpy()]
+
 
+# Delitos con meta departamental: alias posibles en `delito` -> columna de meta
+KPI_GROUPS: Dict[str, Tuple[List[str], str]] = {
+    "homicidios": (["HOMICIDIOS"], "meta_homicidios"),
+    "hurtos": (["HURTOS", "HURTO", "HURTO_PERSONAS"], "meta_hurtos"),
+    "lesiones": (["LESIONES"], "meta_lesiones"),
+}
 
-def crime_rate_and_meta(
+
+def compute_kpis(
     df: pd.DataFrame,
-    crime_filter,
-    meta_col: str,
-) -> Tuple[float, float]:
+    groups: Dict[str, Tuple[List[str], str]] = KPI_GROUPS,
+) -> Dict[str, Tuple[float, float]]:
     """
-    Calcula:
+    Calcula (tasa_real, meta_tasa) para cada grupo de delitos de `groups`:
 
         - tasa_real: casos totales / población total * 100.000
         - meta_tasa: meta departamental promedio (ya viene como tasa por 100.000)
 
-    crime_filter puede ser un string o una lista de delitos.
+    Un grupo sin registros retorna (0.0, 0.0).
+
+    Cada categoría de `delito` se asigna a un grupo con una tabla indexada
+    por código (como en category_mask) y casos / población se acumulan con
+    un solo bincount por columna, en vez de recorrer el frame una vez por
+    delito. Solo las metas se calculan por grupo, sobre sus filas.
     """
-    if isinstance(crime_filter, str):
-        mask = df["delito"] == crime_filter
-    else:
-        mask = df["delito"].isin(crime_filter)
+    delito = df["delito"]
+    if not isinstance(delito.dtype, pd.CategoricalDtype):
+        delito = delito.astype("category")
+
+    n_groups = len(groups)
+    categories = delito.cat.categories
+    # Última posición: categorías sin grupo y código -1 de los nulos
+    lookup = np.full(len(categories) + 1, n_groups, dtype=np.intp)
+    for i, (aliases, _) in enumerate(groups.values()):
+        codes = categories.get_indexer(aliases)
+        lookup[codes[codes >= 0]] = i
+    bucket = lookup[delito.cat.codes.to_numpy()]
+
+    casos = np.bincount(
+        bucket, weights=df["cantidad"].to_numpy(dtype=np.float64), minlength=n_groups + 1
+    )
+    pob = np.bincount(
+        bucket,
+        weights=np.nan_to_num(df["n_poblacion"].to_numpy(dtype=np.float64, na_value=np.nan)),
+        minlength=n_groups + 1,
+    )
+    filas = np.bincount(bucket, minlength=n_groups + 1)
+
+    kpis: Dict[str, Tuple[float, float]] = {}
+    for i, (name, (_, meta_col)) in enumerate(groups.items()):
+        if filas[i] == 0:
+            kpis[name] = (0.0, 0.0)
+            continue
+
+        tasa_real = (casos[i] / pob[i] * 1e5) if pob[i] > 0 else 0.0
+
+        meta_tasa = 0.0
+        if meta_col in df.columns:
+            metas = (
+                df.loc[bucket == i, ["anio", meta_col]]
+                .dropna()
+                .drop_duplicates()
+            )
+            if not metas.empty:
+                meta_tasa = float(metas[meta_col].mean())
 
-    df_crime = df[mask].copy()
-    if df_crime.empty:
-        return 0.0, 0.0
+        kpis[name] = (float(tasa_real), meta_tasa)
 
-    casos_tot = float(df_crime["cantidad"].sum())
-    pob_tot = float(df_crime["n_poblacion"].fillna(0).sum())
+    return kpis
 
-    tasa_real = (casos_tot / pob_tot * 1e5) if pob_tot > 0 else 0.0
 
-    meta_tasa = 0.0
-    if meta_col in df_crime.columns:
-        metas = (
-            df_crime[["anio", meta_col]]
-            .dropna()
-            .drop_duplicates()
-        )
-        if not metas.empty:
-            meta_tasa = float(metas[meta_col].mean())
+def year_slice(df: pd.DataFrame, year_from: int, year_to: int) -> slice:
+    """
+    Posiciones del rango [year_from, year_to] en un DataFrame ordenado por anio.
+
+    El modelo integrado y el cubo se ordenan por año una sola vez al
+    construirse (años nulos al final), así que el rango es un corte
+    contiguo que se ubica con búsqueda binaria en lugar de una máscara.
+    """
+    anio = df["anio"].to_numpy(dtype=np.int64, na_value=np.iinfo(np.int64).max)
+    start = int(np.searchsorted(anio, year_from, side="left"))
+    stop = int(np.searchsorted(anio, year_to, side="right"))
+    return slice(start, stop)
 
-    return tasa_real, meta_tasa
+
+def filter_mask(
+    df: pd.DataFrame,
+    muni_selected: List[str],
+    crime_selected: List[str],
+) -> np.ndarray:
+    """
+    Máscara booleana de los filtros de municipio y delito en un solo arreglo.
+
+    Los predicados se combinan in-place sobre un único arreglo NumPy en
+    lugar de encadenar Series booleanas intermedias. El rango de años se
+    aplica antes con year_slice.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if muni_selected:
+        np.logical_and(mask, category_mask(df["municipio"], muni_selected), out=mask)
+    if crime_selected:
+        np.logical_and(mask, category_mask(df["delito"], crime_selected), out=mask)
+    return mask
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Convierte un agregado a tabla Arrow (sin índice) para Altair / st.dataframe.
+
+    Streamlit transporta los datos al navegador en Arrow; entregarlos ya
+    convertidos evita el paso intermedio por registros / JSON.
+    """
+    return pa.Table.from_pandas(df, preserve_index=False)
 
 
 def build_delta_text(actual: float, meta: float) -> str:
@@ -282,10 +615,16 @@ def build_delta_text(actual: float, meta: float) -> str:
 # 3. TAB 1 - Dashboard descriptivo
 # ============================================================
 
-def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
+def dashboard_tab(
+    df_integrated: pd.DataFrame,
+    mandatos: pd.DataFrame,
+    cache_key: Tuple[float, ...],
+) -> None:
     """Construye la pestaña principal del dashboard descriptivo."""
     st.subheader("📊 Dashboard de Seguridad Ciudadana - Santander")
 
+    cube = build_cube(df_integrated, cache_key)
+
     # ---------------------------
     # Filtros en sidebar
     # ---------------------------
@@ -319,14 +658,13 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
             )
 
 
-        # Subconjunto de datos para construir listas de filtros
-        df_range = df_integrated[
-            (df_integrated["anio"] >= year_from)
-            & (df_integrated["anio"] <= year_to)
-        ].copy()
+        # Listas de filtros: unión de los conjuntos por año del rango
+        yearly = yearly_uniques(cube, cache_key)
+        in_range = [yearly[y] for y in range(year_from, year_to + 1) if y in yearly]
+        municipalities_available = sorted(frozenset().union(*(m for m, _ in in_range)))
+        crimes_available = sorted(frozenset().union(*(d for _, d in in_range)))
 
         # Municipios con opción "Todos"
-        municipalities_available = sorted(df_range["municipio"].dropna().unique())
         muni_options = ["Todos"] + municipalities_available
         muni_sel_raw = st.multiselect(
             "Municipios",
@@ -339,7 +677,6 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
             muni_selected = muni_sel_raw
 
         # Delitos con opción "Todos"
-        crimes_available = sorted(df_range["delito"].dropna().unique())
         crime_options = ["Todos"] + crimes_available
         crime_sel_raw = st.multiselect(
             "Tipos de delito",
@@ -351,24 +688,22 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
         else:
             crime_selected = crime_sel_raw
 
-    # Aplicar filtros globales
-    mask = (df_integrated["anio"] >= year_from) & (df_integrated["anio"] <= year_to)
-    if muni_selected:
-        mask &= df_integrated["municipio"].isin(muni_selected)
-    if crime_selected:
-        mask &= df_integrated["delito"].isin(crime_selected)
+    # Aplicar filtros globales sobre el cubo pre-agregado
+    cube_range = cube.iloc[year_slice(cube, year_from, year_to)]
+    mask = filter_mask(cube_range, muni_selected, crime_selected)
 
-    df_f = df_integrated[mask].copy()
+    df_f = cube_range[mask]
 
     if df_f.empty:
         st.warning("No hay datos para la combinación de filtros seleccionada.")
         return
 
     # Texto de mandatos en rango
-    mandatos_range = mandatos[
-        (mandatos["anio"] >= year_from) & (mandatos["anio"] <= year_to)
+    year_min, mandatos_by_year = mandato_by_year(mandatos, cache_key)
+    mandatos_in_range = mandatos_by_year[
+        max(year_from - year_min, 0) : max(year_to - year_min + 1, 0)
     ]
-    mandatos_list = mandatos_range["mandato"].dropna().unique().tolist()
+    mandatos_list = [m for m in dict.fromkeys(mandatos_in_range) if m is not None]
     mandatos_str = ", ".join(mandatos_list) if mandatos_list else "Sin mandato registrado"
 
     st.markdown(
@@ -402,15 +737,11 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     # ---------------------------
     st.markdown("### Metas departamentales vs realidad (tasa por 100.000 hab.)")
 
-    # Homicidios
-    hom_rate, hom_meta = crime_rate_and_meta(df_f, "HOMICIDIOS", "meta_homicidios")
-
-    # Hurtos (distintos alias posibles)
-    hurto_aliases = ["HURTOS", "HURTO", "HURTO_PERSONAS"]
-    hurto_rate, hurto_meta = crime_rate_and_meta(df_f, hurto_aliases, "meta_hurtos")
-
-    # Lesiones
-    lesions_rate, lesions_meta = crime_rate_and_meta(df_f, "LESIONES", "meta_lesiones")
+    # Homicidios, hurtos (distintos alias posibles) y lesiones en una pasada
+    kpis = compute_kpis(df_f)
+    hom_rate, hom_meta = kpis["homicidios"]
+    hurto_rate, hurto_meta = kpis["hurtos"]
+    lesions_rate, lesions_meta = kpis["lesiones"]
 
     kpi_cols = st.columns(3)
 
@@ -440,18 +771,23 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     # ---------------------------
     # Gráficas principales
     # ---------------------------
+    # Altair serializa los datos de cada gráfica al navegador en cada rerun:
+    # se envían solo las columnas codificadas y cantidad redondeada a int32
+    # (en la tabla de hechos es float64).
 
     # Distribución por municipio
     st.markdown("### Distribución de casos por municipio")
 
     df_muni = (
-        df_f.groupby("municipio", as_index=False)["cantidad"]
+        df_f.groupby("municipio", as_index=False, observed=True, sort=False)["cantidad"]
         .sum()
+        .round({"cantidad": 0})
+        .astype({"cantidad": "int32"})
         .sort_values("cantidad", ascending=False)
     )
 
     chart_muni = (
-        alt.Chart(df_muni)
+        alt.Chart(to_arrow(df_muni))
         .mark_bar()
         .encode(
             x=alt.X("cantidad:Q", title="Número de casos"),
@@ -468,13 +804,15 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     st.markdown("### Distribución por tipo de delito")
 
     df_crime = (
-        df_f.groupby("delito", as_index=False)["cantidad"]
+        df_f.groupby("delito", as_index=False, observed=True, sort=False)["cantidad"]
         .sum()
+        .round({"cantidad": 0})
+        .astype({"cantidad": "int32"})
         .sort_values("cantidad", ascending=False)
     )
 
     chart_crime = (
-        alt.Chart(df_crime)
+        alt.Chart(to_arrow(df_crime))
         .mark_bar()
         .encode(
             x=alt.X("cantidad:Q", title="Número de casos"),
@@ -493,13 +831,15 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     st.markdown("### Evolución mensual dentro del rango de años seleccionado")
 
     df_month = (
-        df_f.groupby(["anio", "mes"], as_index=False)["cantidad"]
+        df_f.groupby(["anio", "mes"], as_index=False, observed=True, sort=False)["cantidad"]
         .sum()
+        .round({"cantidad": 0})
+        .astype({"cantidad": "int32"})
         .sort_values(["anio", "mes"])
     )
 
     chart_month = (
-        alt.Chart(df_month)
+        alt.Chart(to_arrow(df_month))
         .mark_line(point=True)
         .encode(
             x=alt.X("mes:O", title="Mes"),
@@ -516,21 +856,19 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     # Tendencia histórica global (todos los años) para los filtros de municipio/delito
     st.markdown("### Tendencia histórica global (todos los años)")
 
-    mask_hist = np.ones(len(df_integrated), dtype=bool)
-    if crime_selected:
-        mask_hist &= df_integrated["delito"].isin(crime_selected)
-    if muni_selected:
-        mask_hist &= df_integrated["municipio"].isin(muni_selected)
+    mask_hist = filter_mask(cube, muni_selected, crime_selected)
 
     df_hist = (
-        df_integrated[mask_hist]
-        .groupby("anio", as_index=False)["cantidad"]
+        cube[mask_hist]
+        .groupby("anio", as_index=False, observed=True, sort=False)["cantidad"]
         .sum()
+        .round({"cantidad": 0})
+        .astype({"cantidad": "int32"})
         .sort_values("anio")
     )
 
     chart_hist = (
-        alt.Chart(df_hist)
+        alt.Chart(to_arrow(df_hist))
         .mark_line(point=True)
         .encode(
             x=alt.X("anio:O", title="Año"),
@@ -544,7 +882,14 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
     st.markdown("---")
 
     st.markdown("### Detalle de registros (muestra)")
-    st.dataframe(df_f.head(200))
+    # La muestra sí sale de la tabla de hechos; se toman las primeras 200
+    # posiciones que cumplen el filtro sin materializar todo el subconjunto.
+    fact_range = df_integrated.iloc[year_slice(df_integrated, year_from, year_to)]
+    mask_detail = filter_mask(fact_range, muni_selected, crime_selected)
+    st.dataframe(
+        to_arrow(fact_range.iloc[np.flatnonzero(mask_detail)[:200]]),
+        use_container_width=True,
+    )
 
 
 # ============================================================
@@ -554,7 +899,35 @@ def dashboard_tab(df_integrated: pd.DataFrame, mandatos: pd.DataFrame) -> None:
 # (solo se alimenta del nuevo df_integrated)
 # ============================================================
 
-def explain_stats_agent(df: pd.DataFrame, question: str) -> str:
+@st.cache_data(show_spinner=False)
+def llm_context(_df: pd.DataFrame, cache_key: Tuple[float, ...]) -> dict:
+    """
+    Resumen del dataset que se envía como contexto a Gemini.
+
+    No depende de la pregunta, así que se calcula una vez por versión de
+    los datos (`cache_key`) y no en cada turno del chat. Las columnas ya
+    vienen normalizadas desde la carga.
+    """
+    return {
+        # Rango de años
+        "min_year": int(_df["anio"].min()),
+        "max_year": int(_df["anio"].max()),
+        # Totales por delito (top 10)
+        "top_delitos": _df.groupby("delito", observed=True, sort=False)["cantidad"].sum().sort_values(ascending=False).head(10).to_dict(),
+        # Totales por municipio (top 10)
+        "top_muni": _df.groupby("municipio", observed=True, sort=False)["cantidad"].sum().sort_values(ascending=False).head(10).to_dict(),
+        # Muestra de datos (primeras 5 filas como csv string)
+        "sample_csv": _df.head(5).to_csv(index=False),
+        # Estructura de columnas
+        "columns_info": list(_df.columns),
+    }
+
+
+def explain_stats_agent(
+    df: pd.DataFrame,
+    question: str,
+    cache_key: Tuple[float, ...],
+) -> str:
     """
     Agente basado en Gemini 1.5 Flash que:
         - Recibe el dataframe (contexto resumido) y la pregunta.
@@ -565,23 +938,13 @@ def explain_stats_agent(df: pd.DataFrame, question: str) -> str:
 
     # 1. Preparar contexto de los datos
     # Para no saturar el contexto, enviamos un resumen estadístico y la estructura
-    df = normalize_columns(df)
-    
-    # Rango de años
-    min_year = int(df["anio"].min())
-    max_year = int(df["anio"].max())
-    
-    # Totales por delito (top 10)
-    top_delitos = df.groupby("delito")["cantidad"].sum().sort_values(ascending=False).head(10).to_dict()
-    
-    # Totales por municipio (top 10)
-    top_muni = df.groupby("municipio")["cantidad"].sum().sort_values(ascending=False).head(10).to_dict()
-    
-    # Muestra de datos (primeras 5 filas como csv string)
-    sample_csv = df.head(5).to_csv(index=False)
-    
-    # Estructura de columnas
-    columns_info = list(df.columns)
+    ctx = llm_context(df, cache_key)
+    min_year = ctx["min_year"]
+    max_year = ctx["max_year"]
+    top_delitos = ctx["top_delitos"]
+    top_muni = ctx["top_muni"]
+    sample_csv = ctx["sample_csv"]
+    columns_info = ctx["columns_info"]
 
     context_prompt = f"""
     Actúa como un experto analista de seguridad ciudadana en Santander, Colombia.
@@ -619,7 +982,7 @@ def explain_stats_agent(df: pd.DataFrame, question: str) -> str:
         return f"Ocurrió un error al consultar a Gemini: {str(e)}"
 
 
-def chatbot_tab(df_integrated: pd.DataFrame) -> None:
+def chatbot_tab(df_integrated: pd.DataFrame, cache_key: Tuple[float, ...]) -> None:
     """Pestaña de chatbot/agente de datos."""
     st.subheader("🤖 Chat comunitario de datos y rutas de atención")
 
@@ -657,7 +1020,7 @@ Ejemplos de preguntas:
             st.session_state.chat_history.append(
                 {"role": "user", "content": question}
             )
-            answer = explain_stats_agent(df_integrated, question)
+            answer = explain_stats_agent(df_integrated, question, cache_key)
             st.session_state.chat_history.append(
                 {"role": "assistant", "content": answer}
             )
@@ -700,35 +1063,55 @@ def load_model_datasets() -> dict:
     return datasets
 
 
+@st.cache_data(show_spinner=False)
+def baseline_index(
+    _cube: pd.DataFrame,
+    cache_key: Tuple[float, ...],
+) -> Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Serie anual de casos por (municipio, delito), ordenada por año.
+
+    Se calcula una vez por versión de los datos; cada predicción baseline
+    pasa a ser una búsqueda en el diccionario.
+    """
+    df_agg = (
+        _cube.groupby(["municipio", "delito", "anio"], observed=True)["cantidad"]
+        .sum()
+        .reset_index()
+    )
+    return {
+        (muni, delito): (
+            grp["anio"].to_numpy(dtype=np.int64),
+            grp["cantidad"].to_numpy(dtype=np.float64),
+        )
+        for (muni, delito), grp in df_agg.groupby(
+            ["municipio", "delito"], observed=True, sort=False
+        )
+    }
+
+
 def simple_baseline_prediction(
-    df: pd.DataFrame,
+    history: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]],
     municipio: str,
     delito: str,
     target_year: int,
 ) -> tuple[float | None, str | pd.DataFrame]:
-    df = df.copy()
-
-    df_f = df[(df["municipio"] == municipio) & (df["delito"] == delito)].copy()
-    if df_f.empty:
+    """Promedio de los últimos 3 años anteriores a target_year (ver baseline_index)."""
+    if (municipio, delito) not in history:
         return None, "No hay datos históricos para ese municipio y delito."
 
-    df_hist = df_f[df_f["anio"] < target_year]
-    if df_hist.empty:
+    years, cases = history[(municipio, delito)]
+    n_prev = int(np.searchsorted(years, target_year, side="left"))
+    if n_prev == 0:
         return None, "No hay años anteriores al objetivo para calcular un promedio."
 
-    df_agg = (
-        df_hist.groupby("anio", as_index=False)["cantidad"]
-        .sum()
-        .sort_values("anio")
-    )
-
-    pred = float(df_agg["cantidad"].tail(3).mean())
-    detalle = df_agg.rename(columns={"anio": "Año", "cantidad": "Casos"})
+    pred = float(cases[max(n_prev - 3, 0):n_prev].mean())
+    detalle = pd.DataFrame({"Año": years[:n_prev], "Casos": cases[:n_prev]})
 
     return pred, detalle
 
 
-def prediction_tab(df_integrated: pd.DataFrame) -> None:
+def prediction_tab(df_integrated: pd.DataFrame, cache_key: Tuple[float, ...]) -> None:
     st.subheader("🔮 Módulos predictivos y datasets de modelado")
 
     ml_data = load_model_datasets()
@@ -868,10 +1251,10 @@ Cuando tengas los modelos entrenados, aquí mismo podrás conectarlos.
     st.markdown("---")
     st.subheader("🧪 Baseline histórico rápido (demo de predicción)")
 
-    df = df_integrated.copy()
+    cube = build_cube(df_integrated, cache_key)
 
-    municipios = sorted(df["municipio"].dropna().unique())
-    delitos = sorted(df["delito"].dropna().unique())
+    municipios = sorted(cube["municipio"].dropna().unique())
+    delitos = sorted(cube["delito"].dropna().unique())
 
     col1, col2 = st.columns(2)
     with col1:
@@ -879,8 +1262,8 @@ Cuando tengas los modelos entrenados, aquí mismo podrás conectarlos.
     with col2:
         delito_sel = st.selectbox("Tipo de delito", delitos)
 
-    year_min = int(df["anio"].min())
-    year_max = int(df["anio"].max())
+    year_min = int(cube["anio"].min())
+    year_max = int(cube["anio"].max())
 
     target_year = st.number_input(
         "Año a predecir (baseline)",
@@ -892,7 +1275,7 @@ Cuando tengas los modelos entrenados, aquí mismo podrás conectarlos.
 
     if st.button("Calcular predicción baseline", type="primary"):
         pred, detail = simple_baseline_prediction(
-            df,
+            baseline_index(cube, cache_key),
             municipio=muni_sel,
             delito=delito_sel,
             target_year=target_year,
@@ -917,29 +1300,13 @@ def main() -> None:
     st.title("Tablero Inteligente de Seguridad Ciudadana - Santander")
 
     try:
-        data = load_base_tables()
+        mtimes = source_mtimes()
+        mandatos = load_mandatos(mtimes)
+        df_integrated = load_integrated_df(mtimes)
     except Exception as exc:  # noqa: BLE001
         st.error(f"Error cargando los datos: {exc}")
         st.stop()
 
-    metas = data["metas"]
-    mandatos = data["mandatos"]
-    poblacion = data["poblacion"]
-    policia = data["policia"]
-    municipios = data["municipios"]
-    delitos_bucaramanga = data["delitos_bucaramanga"]
-    delitos_informaticos = data["delitos_informaticos"]
-
-    df_integrated = build_integrated_df(
-        metas,
-        mandatos,
-        poblacion,
-        policia,
-        municipios,
-        delitos_bucaramanga,
-        delitos_informaticos,
-    )
-
     tab1, tab2, tab3 = st.tabs(
         [
             "📊 Dashboard",
@@ -949,13 +1316,13 @@ def main() -> None:
     )
 
     with tab1:
-        dashboard_tab(df_integrated, mandatos)
+        dashboard_tab(df_integrated, mandatos, mtimes)
 
     with tab2:
-        chatbot_tab(df_integrated)
+        chatbot_tab(df_integrated, mtimes)
 
     with tab3:
-        prediction_tab(df_integrated)
+        prediction_tab(df_integrated, mtimes)
 
 
 if __name__ == "__main__":
@@ -7,7 +7,14 @@ Orquestador del pipeline de Datos-al-Ecosistema.
 Funcionalidades:
 - Detecta si es la primera ejecución (no existe o está vacía la carpeta `data/`).
 - Si NO es la primera ejecución, crea un backup de `data/` en `history/AAAAMMDD_HHMMSS/`.
-- Descubre los scripts en la carpeta `scripts/` y los ejecuta en orden alfabético.
+- Descubre los scripts en la carpeta `scripts/` y los ejecuta como un DAG:
+  cada fase (prefijo) espera a las anteriores y los scripts de una misma
+  fase corren en paralelo, salvo dependencias declaradas en SCRIPT_DEPENDENCIES.
+- Ejecución incremental: omite los scripts declarados en SCRIPT_IO cuyo código
+  y entradas no cambiaron (hash en `data/.pipeline_manifest.json`) y cuyas
+  salidas siguen existiendo.
+- Reintenta los scripts de extracción (fase 01_) que fallan, con espera
+  creciente entre intentos (ver RETRY_STAGES).
 - Pensado para ejecutarse bajo demanda o programado (cron, Task Scheduler).
 
 Fases del pipeline (por prefijo):
@@ -17,7 +24,7 @@ Fases del pipeline (por prefijo):
     03_  Gold - Integración y enriquecimiento de datos
     04_  Model - Generación de datasets para ML y dashboard
 
-Scripts ejecutados (en orden alfabético):
+Scripts ejecutados (por fase; dentro de cada fase, en paralelo):
     00_setup.py                              # Configuración inicial
     01_extract_bronze.py                     # Extracción de datos bronze
     01_generate_polygon_santander.py         # Polígonos geográficos
@@ -44,41 +51,274 @@ Opciones:
     python run_pipeline.py --dry-run        # Muestra qué haría, sin ejecutar scripts ni copiar datos
     python run_pipeline.py --no-backup      # Ejecuta el pipeline sin crear backup de data/
     python run_pipeline.py --scripts-dir scripts_alt  # Usar otra carpeta de scripts
+    python run_pipeline.py --max-workers 1  # Un script a la vez (ejecución secuencial)
+    python run_pipeline.py --force          # Ejecuta todos los scripts aunque estén al día
+    python run_pipeline.py --retries 0      # Sin reintentos de los scripts de extracción
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import datetime as dt
+import functools
+import hashlib
+import json
 import logging
+import os
 import shutil
-import subprocess
 import sys
+from collections import deque
 from pathlib import Path
-from typing import List
+from typing import Callable, Deque, Dict, List, Set
+
+try:  # Solo en sistemas POSIX; en Windows se copia siempre con shutil
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
 
 # --- Configuración básica de rutas ---
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 DATA_DIR = PROJECT_ROOT / "data"
 HISTORY_DIR = PROJECT_ROOT / "history"
+MANIFEST_PATH = DATA_DIR / ".pipeline_manifest.json"
+
+# ioctl FICLONE de Linux (linux/fs.h): clon copy-on-write en Btrfs/XFS
+FICLONE = 0x40049409
+
+# --- Dependencias del DAG ---
+
+# Por defecto cada script depende de todos los scripts de fases anteriores
+# (prefijo 00_, 01_, ...). Aquí se declaran las dependencias adicionales
+# DENTRO de una misma fase: scripts que leen la salida de otro del mismo prefijo
+# o que no deben correr a la vez.
+SCRIPT_DEPENDENCIES: Dict[str, List[str]] = {
+    # Ambos leen los mismos Excel con un pool de os.cpu_count() procesos y
+    # arman el DataFrame unificado completo: en serie para no duplicar
+    # procesos ni el pico de memoria
+    "02_process_policia.py": ["02_process_policia_completo.py"],
+    # gold/base/*.parquet lo escribe 03_process_silver_data.py
+    "03_generate_gold.py": ["03_process_silver_data.py"],
+    # gold/analytics/gold_analytics.parquet lo escribe 04_generate_analytics.py
+    "04_generate_classification_monthly_dataset.py": ["04_generate_analytics.py"],
+    "04_generate_regression_monthly_dataset.py": ["04_generate_analytics.py"],
+    "04_generate_regression_timeseries_dataset.py": ["04_generate_analytics.py"],
+}
+
+DEFAULT_MAX_WORKERS = 4
+
+# --- Reintentos ---
+
+# Solo se reintentan las fases que dependen de fuentes externas (APIs,
+# descargas, scraping), donde un fallo suele ser transitorio; un error en
+# las demás fases es determinista y detiene el pipeline de inmediato.
+RETRY_STAGES: Set[str] = {"01"}
+DEFAULT_RETRIES = 2
+RETRY_DELAY_SECONDS = 10  # se duplica en cada reintento
+
+# --- Entradas / salidas para la ejecución incremental ---
+
+# Globs relativos a la raíz del proyecto (ver "Entrada/Salida" en el docstring
+# de cada script). Un script declarado aquí se omite si su código (junto con
+# los módulos compartidos `_*.py`) y sus entradas tienen el mismo hash que en
+# la última ejecución correcta y todas sus salidas existen. Los scripts sin
+# declarar (setup y extracciones de fuentes externas, que no tienen entradas
+# locales) se ejecutan siempre.
+SCRIPT_IO: Dict[str, Dict[str, List[str]]] = {
+    "02_datos_poblacion_santander.py": {
+        "inputs": ["data/bronze/poblacion_dane/TerriData_Pob_*.zip"],
+        "outputs": ["data/silver/poblacion/poblacion_santander.parquet"],
+    },
+    "02_extract_metas.py": {
+        "inputs": ["data/bronze/metas/*.xlsx"],
+        "outputs": [
+            "data/silver/metas/mandatos.parquet",
+            "data/silver/metas/metas.parquet",
+        ],
+    },
+    "02_process_danegeo.py": {
+        "inputs": [
+            "data/bronze/dane_geo/divipola_2010.xls",
+            "data/bronze/dane_geo/santander_municipios.parquet",
+        ],
+        "outputs": [
+            "data/silver/dane_geo/divipola_silver.parquet",
+            "data/silver/dane_geo/geografia_silver.parquet",
+            "data/silver/dane_geo/geografia_silver.geojson",
+        ],
+    },
+    "02_process_policia.py": {
+        "inputs": [
+            "data/bronze/policia_scraping/*.xlsx",
+            "data/bronze/policia_scraping/*.xls",
+        ],
+        "outputs": ["data/silver/policia_scraping/policia_santander.parquet"],
+    },
+    "02_process_policia_completo.py": {
+        "inputs": [
+            "data/bronze/policia_scraping/*.xlsx",
+            "data/bronze/policia_scraping/*.xls",
+        ],
+        "outputs": ["data/silver/policia_scraping/policia_completo.parquet"],
+    },
+    "02_process_socrata.py": {
+        "inputs": ["data/bronze/socrata_api/*.json"],
+        "outputs": ["data/silver/delitos/consolidado_delitos.parquet"],
+    },
+    "02_socrata_bucaramanga_to_parquet.py": {
+        "inputs": [
+            "data/bronze/socrata_api/bucaramanga_delictiva_150.json",
+            "data/bronze/socrata_api/bucaramanga_delitos_40.json",
+            "data/bronze/socrata_api/delitos_informaticos.json",
+        ],
+        "outputs": [
+            "data/silver/socrata_api/delitos_bucaramanga.parquet",
+            "data/silver/socrata_api/delitos_informaticos.parquet",
+        ],
+    },
+    "03_process_silver_data.py": {
+        "inputs": [
+            "data/silver/dane_geo/geografia_silver.parquet",
+            "data/silver/dane_geo/divipola_silver.parquet",
+            "data/silver/policia_scraping/policia_santander.parquet",
+            "data/silver/delitos/consolidado_delitos.parquet",
+            "data/silver/poblacion/poblacion_santander.parquet",
+        ],
+        "outputs": [
+            "data/gold/base/geo_gold.parquet",
+            "data/gold/base/policia_gold.parquet",
+            "data/gold/base/socrata_gold.parquet",
+            "data/gold/base/poblacion_gold.parquet",
+            "data/gold/base/divipola_gold.parquet",
+        ],
+    },
+    "03_generate_gold.py": {
+        "inputs": [
+            "data/gold/base/geo_gold.parquet",
+            "data/gold/base/policia_gold.parquet",
+            "data/gold/base/poblacion_gold.parquet",
+            "data/gold/base/divipola_gold.parquet",
+        ],
+        "outputs": ["data/gold/gold_integrado.parquet"],
+    },
+    "04_generate_analytics.py": {
+        "inputs": ["data/gold/gold_integrado.parquet"],
+        "outputs": ["data/gold/analytics/gold_analytics.parquet"],
+    },
+    "04_generate_classification_dominant_dataset.py": {
+        "inputs": ["data/gold/base/policia_gold.parquet"],
+        "outputs": ["data/gold/model/classification_dominant_dataset.parquet"],
+    },
+    "04_generate_classification_event_dataset.py": {
+        "inputs": [
+            "data/gold/base/policia_gold.parquet",
+            "data/gold/gold_integrado.parquet",
+        ],
+        "outputs": ["data/gold/model/classification_event_dataset.parquet"],
+    },
+    "04_generate_classification_monthly_dataset.py": {
+        "inputs": ["data/gold/analytics/gold_analytics.parquet"],
+        "outputs": ["data/gold/model/classification_monthly_dataset.parquet"],
+    },
+    "04_generate_clustering_geo_dataset.py": {
+        "inputs": ["data/gold/gold_integrado.parquet"],
+        "outputs": ["data/gold/model/clustering_geo_dataset.parquet"],
+    },
+    "04_generate_dashboard_data.py": {
+        "inputs": [
+            "data/silver/dane_geo/geografia_silver.parquet",
+            "data/silver/metas/*.parquet",
+            "data/silver/poblacion/poblacion_santander.parquet",
+            "data/silver/policia_scraping/policia_santander.parquet",
+            "data/silver/socrata_api/delitos_informaticos.parquet",
+            "data/silver/socrata_api/delitos_bucaramanga.parquet",
+        ],
+        "outputs": [
+            "data/gold/dashboard/municipios.parquet",
+            "data/gold/dashboard/poblacion_santander.parquet",
+            "data/gold/dashboard/policia_santander.parquet",
+            "data/gold/dashboard/delitos_informaticos.parquet",
+            "data/gold/dashboard/delitos_bucaramanga.parquet",
+            "data/gold/dashboard/metas.parquet",
+            "data/gold/dashboard/mandatos.parquet",
+        ],
+    },
+    "04_generate_regression_annual_dataset.py": {
+        "inputs": ["data/gold/gold_integrado.parquet"],
+        "outputs": ["data/gold/model/regression_annual_dataset.parquet"],
+    },
+    "04_generate_regression_monthly_dataset.py": {
+        "inputs": ["data/gold/analytics/gold_analytics.parquet"],
+        "outputs": ["data/gold/model/regression_monthly_dataset.parquet"],
+    },
+    "04_generate_regression_timeseries_dataset.py": {
+        "inputs": ["data/gold/analytics/gold_analytics.parquet"],
+        "outputs": ["data/gold/model/regression_timeseries_dataset.parquet"],
+    },
+}
+
+# Salida de los subprocesos: tope por línea y líneas de STDERR a conservar
+STREAM_LINE_LIMIT = 1024 * 1024
+STDERR_TAIL_LINES = 50
 
 
 # --- Utilidades generales ---
 
+@functools.lru_cache(maxsize=1)
+def _data_empty() -> bool:
+    """
+    True si `data/` no existe o está vacía.
+
+    Basta leer la primera entrada con os.scandir. El resultado se memoiza:
+    is_first_run y create_history_snapshot lo consultan al inicio de la
+    misma ejecución, antes de que corra cualquier script.
+    """
+    try:
+        with os.scandir(DATA_DIR) as it:
+            return next(it, None) is None
+    except FileNotFoundError:
+        return True
+
+
 def is_first_run() -> bool:
     """
     Devuelve True si se considera que es la primera ejecución del pipeline.
     Criterio: no existe la carpeta `data/` o está vacía.
     """
-    if not DATA_DIR.exists():
-        return True
-    # Si existe pero no tiene nada dentro, lo tratamos como primera corrida
-    try:
-        next(DATA_DIR.iterdir())
-    except StopIteration:
-        return True
-    return False
+    return _data_empty()
+
+
+def _clone_file(src: str, dst: str) -> None:
+    """
+    Copia un archivo intentando primero un clon copy-on-write (reflink).
+
+    En sistemas de archivos con reflink el clon solo crea metadatos y los
+    bloques se comparten hasta que alguno de los dos archivos se modifica.
+    No se usan hardlinks: los scripts sobrescriben sus salidas en el mismo
+    inodo y eso alteraría también el backup.
+    """
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass  # Sin soporte de reflink (ext4, tmpfs, NTFS...): copia normal
+    shutil.copy2(src, dst)
+
+
+def _clone_tree(src: Path, dst: Path) -> None:
+    """Replica `src` dentro de `dst` (recorrido con os.scandir)."""
+    dst.mkdir(parents=True, exist_ok=True)
+    with os.scandir(src) as it:
+        for entry in it:
+            target = dst / entry.name
+            if entry.is_dir():
+                _clone_tree(Path(entry.path), target)
+            else:
+                _clone_file(entry.path, str(target))
 
 
 def create_history_snapshot(dry_run: bool = False) -> Path | None:
@@ -93,9 +333,7 @@ def create_history_snapshot(dry_run: bool = False) -> Path | None:
         return None
 
     # Comprobamos si hay contenido en data/
-    try:
-        next(DATA_DIR.iterdir())
-    except StopIteration:
+    if _data_empty():
         logging.info("La carpeta 'data/' está vacía. No se crea backup.")
         return None
 
@@ -112,7 +350,8 @@ def create_history_snapshot(dry_run: bool = False) -> Path | None:
 
     # Copiamos el contenido de data/ dentro de history/timestamp/
     # Esto replica la ESTRUCTURA de data/ directamente dentro de la carpeta con fecha.
-    shutil.copytree(DATA_DIR, backup_dir, dirs_exist_ok=True)
+    # Con reflink (Btrfs/XFS) cada archivo se clona sin duplicar sus bloques.
+    _clone_tree(DATA_DIR, backup_dir)
 
     logging.info("Backup creado correctamente en '%s'.", backup_dir)
     return backup_dir
@@ -132,26 +371,65 @@ def discover_scripts(scripts_dir: Path) -> List[Path]:
         logging.warning("La carpeta de scripts '%s' no existe.", scripts_dir)
         return []
 
-    scripts = sorted(
-        p
-        for p in scripts_dir.glob("*.py")
-        if p.name != "__init__.py" and not p.name.startswith("_")
-    )
+    # Una sola pasada con os.scandir: DirEntry.is_file() reutiliza el tipo
+    # que ya devuelve el listado del directorio, sin un stat por archivo.
+    with os.scandir(scripts_dir) as it:
+        names = [
+            entry.name
+            for entry in it
+            if entry.name.endswith(".py")
+            and entry.name != "__init__.py"
+            and not entry.name.startswith("_")
+            and entry.is_file()
+        ]
+    scripts = [scripts_dir / name for name in sorted(names)]
 
     if not scripts:
         logging.warning("No se encontraron scripts .py en '%s'.", scripts_dir)
     else:
-        logging.info("Scripts de pipeline encontrados (en orden de ejecución):")
+        logging.info("Scripts de pipeline encontrados (en orden alfabético):")
         for s in scripts:
             logging.info("  - %s", s.relative_to(PROJECT_ROOT))
 
     return scripts
 
 
-def run_script(script_path: Path, dry_run: bool = False) -> None:
+async def _pump(
+    stream: asyncio.StreamReader,
+    log: Callable[..., None],
+    rel: Path,
+    tail: Deque[str] | None = None,
+) -> None:
+    """
+    Reenvía al log, línea a línea, la salida de un subproceso.
+
+    Una línea más larga que STREAM_LINE_LIMIT se reenvía en trozos de ese
+    tamaño (iterar el stream directamente lanzaría ValueError).
+    """
+    while True:
+        try:
+            raw = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as exc:
+            # Fin del stream: queda a lo sumo una última línea sin salto
+            raw = exc.partial
+            if not raw:
+                break
+        except asyncio.LimitOverrunError:
+            raw = await stream.read(STREAM_LINE_LIMIT)
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        log("[%s] %s", rel, line)
+        if tail is not None:
+            tail.append(line)
+
+
+async def run_script(script_path: Path, dry_run: bool = False) -> None:
     """
     Ejecuta un script Python como subproceso: `python script_path`.
 
+    La salida se transmite al log en tiempo real (STDOUT como INFO, STDERR
+    como WARNING) en lugar de acumularse en memoria hasta que el script
+    termina; solo se guardan las últimas líneas de STDERR para el error.
+
     Si `dry_run` es True, no ejecuta nada, solo informa.
     Lanza excepciones si hay errores en la ejecución.
     """
@@ -163,38 +441,240 @@ def run_script(script_path: Path, dry_run: bool = False) -> None:
 
     logging.info("Ejecutando script: %s", rel)
 
-    result = subprocess.run(
-        [sys.executable, str(script_path)],
-        check=False,
-        capture_output=True,
-        text=True,
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(script_path),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        # Sin buffer en el hijo para que los prints lleguen al momento
+        env={**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"},
+        limit=STREAM_LINE_LIMIT,
     )
 
-    if result.returncode != 0:
-        logging.error("Error al ejecutar %s (returncode=%s)", rel, result.returncode)
-        if result.stdout:
-            logging.error("STDOUT:\n%s", result.stdout)
-        if result.stderr:
-            logging.error("STDERR:\n%s", result.stderr)
+    stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    try:
+        await asyncio.gather(
+            _pump(proc.stdout, logging.info, rel),
+            _pump(proc.stderr, logging.warning, rel, stderr_tail),
+        )
+        returncode = await proc.wait()
+    except BaseException:
+        # Otro script falló (CancelledError) o falló la lectura de la salida:
+        # detenemos también este subproceso antes de propagar
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+
+    if returncode != 0:
+        logging.error("Error al ejecutar %s (returncode=%s)", rel, returncode)
+        if stderr_tail:
+            logging.error("STDERR (últimas líneas):\n%s", "\n".join(stderr_tail))
         # Detenemos el pipeline en el primer error
-        raise RuntimeError(f"Fallo en el script {rel} (returncode={result.returncode})")
-
-    if result.stdout:
-        logging.debug("STDOUT (%s):\n%s", rel, result.stdout)
-    if result.stderr:
-        logging.debug("STDERR (%s):\n%s", rel, result.stderr)
+        raise RuntimeError(f"Fallo en el script {rel} (returncode={returncode})")
 
     logging.info("Script finalizado correctamente: %s", rel)
 
 
-def run_pipeline(scripts_dir: Path, *, do_backup: bool, dry_run: bool) -> None:
+def load_manifest() -> Dict[str, dict]:
+    """Lee el manifiesto de ejecuciones previas (vacío si no existe o está dañado)."""
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: Dict[str, dict]) -> None:
+    """Persiste el manifiesto (escritura atómica vía archivo temporal)."""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(MANIFEST_PATH)
+
+
+def expand_globs(patterns: List[str]) -> List[Path]:
+    """Archivos que coinciden con los globs (relativos a PROJECT_ROOT), ordenados."""
+    return sorted({p for pattern in patterns for p in PROJECT_ROOT.glob(pattern) if p.is_file()})
+
+
+def script_input_hash(script_path: Path) -> str | None:
+    """
+    Hash blake2b del código del script, de los módulos compartidos de
+    scripts/ (`_*.py`, p. ej. _parquet.py) y de sus entradas declaradas.
+
+    Devuelve None si el script no declara entradas/salidas en SCRIPT_IO
+    (en ese caso siempre se ejecuta).
+    """
+    io = SCRIPT_IO.get(script_path.name)
+    if io is None:
+        return None
+
+    digest = hashlib.blake2b()
+    digest.update(script_path.read_bytes())
+    # Los módulos compartidos también definen el resultado (opciones de
+    # escritura, transformaciones comunes): un cambio en ellos invalida el hash
+    for shared in sorted(script_path.parent.glob("_*.py")):
+        digest.update(shared.read_bytes())
+    for path in expand_globs(io["inputs"]):
+        digest.update(path.relative_to(PROJECT_ROOT).as_posix().encode("utf-8"))
+        with path.open("rb") as fh:
+            digest.update(hashlib.file_digest(fh, "blake2b").digest())
+    return digest.hexdigest()
+
+
+def outputs_exist(script_path: Path) -> bool:
+    """True si cada glob de salida declarado tiene al menos un archivo."""
+    return all(
+        any(p.is_file() for p in PROJECT_ROOT.glob(pattern))
+        for pattern in SCRIPT_IO[script_path.name]["outputs"]
+    )
+
+
+def script_stage(script_path: Path) -> str:
+    """Fase de un script según su prefijo (`01_extract_bronze.py` -> `01`)."""
+    return script_path.name.split("_", 1)[0]
+
+
+def build_dag(scripts: List[Path]) -> Dict[Path, List[Path]]:
+    """
+    Construye el grafo de dependencias {script: [predecesores]}.
+
+    - Cada script depende de todos los scripts de fases anteriores.
+    - Se suman las dependencias de SCRIPT_DEPENDENCIES dentro de la fase
+      (las que no estén entre los scripts descubiertos se ignoran).
+    """
+    by_name = {p.name: p for p in scripts}
+    dag: Dict[Path, List[Path]] = {}
+
+    for script in scripts:
+        stage = script_stage(script)
+        deps = [p for p in scripts if script_stage(p) < stage]
+        for name in SCRIPT_DEPENDENCIES.get(script.name, []):
+            if name in by_name:
+                deps.append(by_name[name])
+            else:
+                logging.warning(
+                    "Dependencia '%s' de %s no encontrada; se ignora.", name, script.name
+                )
+        dag[script] = deps
+
+    return dag
+
+
+async def run_dag(
+    dag: Dict[Path, List[Path]],
+    *,
+    dry_run: bool,
+    max_workers: int,
+    force: bool = False,
+    retries: int = DEFAULT_RETRIES,
+) -> None:
+    """
+    Ejecuta los scripts del DAG con una cola de listos.
+
+    Un script se lanza en cuanto terminan todos sus predecesores, así un
+    script lento (p. ej. un scraping) no bloquea a los demás de su fase.
+    Un semáforo limita a `max_workers` los subprocesos simultáneos. Ante el
+    primer error se cancelan los demás scripts y se propaga la excepción.
+
+    Con `force=False` se omiten los scripts al día según el manifiesto; el
+    hash se calcula cuando el script está listo, es decir, después de que
+    sus predecesores regeneraron (o no) sus entradas.
+
+    Los scripts de RETRY_STAGES que fallan se reintentan hasta `retries`
+    veces (esperando RETRY_DELAY_SECONDS, 2x, 4x, ...) antes de dar el
+    error por definitivo. Durante la espera el script libera su cupo.
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    manifest = load_manifest()
+
+    async def run_bounded(script: Path) -> None:
+        async with semaphore:
+            input_hash = await asyncio.to_thread(script_input_hash, script)
+            if (
+                not force
+                and input_hash is not None
+                and manifest.get(script.name, {}).get("hash") == input_hash
+                and outputs_exist(script)
+            ):
+                logging.info("SKIP (sin cambios): %s", script.relative_to(PROJECT_ROOT))
+                return
+
+        attempts = retries + 1 if script_stage(script) in RETRY_STAGES else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                async with semaphore:
+                    await run_script(script, dry_run)
+                break
+            except RuntimeError:
+                if attempt == attempts:
+                    raise
+                delay = RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+                logging.warning(
+                    "Reintentando %s en %ss (intento %s de %s)",
+                    script.relative_to(PROJECT_ROOT), delay, attempt + 1, attempts,
+                )
+                await asyncio.sleep(delay)
+
+        if input_hash is not None and not dry_run:
+            manifest[script.name] = {
+                "hash": input_hash,
+                "outputs": [
+                    p.relative_to(PROJECT_ROOT).as_posix()
+                    for p in expand_globs(SCRIPT_IO[script.name]["outputs"])
+                ],
+                "mtime": dt.datetime.now().isoformat(timespec="seconds"),
+            }
+            save_manifest(manifest)
+
+    pending: Dict[Path, Set[Path]] = {s: set(deps) for s, deps in dag.items()}
+    done: Set[Path] = set()
+    running: Dict[asyncio.Task, Path] = {}
+
+    def submit_ready() -> None:
+        for script in [s for s, deps in pending.items() if deps <= done]:
+            del pending[script]
+            running[asyncio.create_task(run_bounded(script))] = script
+
+    submit_ready()
+    while running:
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            script = running.pop(task)
+            if task.exception() is not None:
+                # Detenemos el pipeline en el primer error
+                for other in running:
+                    other.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+                raise task.exception()
+            done.add(script)
+        submit_ready()
+
+    if pending:
+        # Solo ocurre con dependencias cíclicas en SCRIPT_DEPENDENCIES
+        names = ", ".join(sorted(p.name for p in pending))
+        raise RuntimeError(f"Dependencias sin resolver (¿ciclo?): {names}")
+
+
+def run_pipeline(
+    scripts_dir: Path,
+    *,
+    do_backup: bool,
+    dry_run: bool,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    force: bool = False,
+    retries: int = DEFAULT_RETRIES,
+) -> None:
     """
     Orquesta el pipeline completo:
 
     1. Detecta primera ejecución.
     2. Si no es primera ejecución y do_backup=True, crea backup de data/.
     3. Descubre scripts en scripts_dir.
-    4. Ejecuta scripts uno por uno en orden alfabético.
+    4. Ejecuta los scripts según el DAG de fases/dependencias, con hasta
+       `max_workers` scripts en paralelo, omitiendo los que están al día
+       (salvo `force=True`) y reintentando hasta `retries` veces los
+       scripts de extracción que fallen.
     """
     first = is_first_run()
 
@@ -213,8 +693,15 @@ def run_pipeline(scripts_dir: Path, *, do_backup: bool, dry_run: bool) -> None:
         logging.error("No hay scripts para ejecutar. Pipeline abortado.")
         return
 
-    for script in scripts:
-        run_script(script, dry_run=dry_run)
+    asyncio.run(
+        run_dag(
+            build_dag(scripts),
+            dry_run=dry_run,
+            max_workers=max_workers,
+            force=force,
+            retries=retries,
+        )
+    )
 
     logging.info("Pipeline ejecutado completamente sin errores.")
 
@@ -245,6 +732,32 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         help="Modo simulación: no ejecuta scripts ni copia datos, solo muestra lo que haría.",
     )
 
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=(
+            "Máximo de scripts ejecutándose en paralelo "
+            f"(por defecto: {DEFAULT_MAX_WORKERS}; 1 = secuencial)."
+        ),
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ejecuta todos los scripts, ignorando el manifiesto de ejecución incremental.",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=(
+            "Reintentos de un script de extracción (fase 01_) que falla "
+            f"(por defecto: {DEFAULT_RETRIES}; 0 = sin reintentos)."
+        ),
+    )
+
     parser.add_argument(
         "--verbose",
         "-v",
@@ -281,6 +794,9 @@ def main(argv: list[str] | None = None) -> int:
             scripts_dir=scripts_dir,
             do_backup=not args.no_backup,
             dry_run=args.dry_run,
+            max_workers=max(1, args.max_workers),
+            force=args.force,
+            retries=max(0, args.retries),
         )
     except Exception as e:
         logging.exception("El pipeline terminó con errores: %s", e)
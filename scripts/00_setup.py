@@ -70,23 +70,22 @@ def create_structure() -> None:
         "dashboard",
     ]
 
-    # Crear estructura para bronze
-    for sub in bronze_subfolders:
-        path = DATA_DIR / "bronze" / sub
-        ensure_folder(path)
-        print(f"✔ Creado: {path}")
+    # Rutas de las tres capas en una sola lista
+    paths = [
+        DATA_DIR / layer / sub
+        for layer, subfolders in (
+            ("bronze", bronze_subfolders),
+            ("silver", silver_subfolders),
+            ("gold", gold_subfolders),
+        )
+        for sub in subfolders
+    ]
 
-    # Crear estructura para silver
-    for sub in silver_subfolders:
-        path = DATA_DIR / "silver" / sub
+    for path in paths:
         ensure_folder(path)
-        print(f"✔ Creado: {path}")
 
-    # Crear estructura para gold
-    for sub in gold_subfolders:
-        path = DATA_DIR / "gold" / sub
-        ensure_folder(path)
-        print(f"✔ Creado: {path}")
+    # Un solo resumen en lugar de una línea por carpeta
+    print(f"✔ {len(paths)} carpetas creadas/verificadas en: {DATA_DIR}")
 
 
 def main() -> None:
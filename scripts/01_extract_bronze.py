@@ -27,11 +27,19 @@ Adicionales (Bucaramanga y Cibercrimen):
     - DELITOS_INFORMATICOS: 4v6r-wu98
 """
 
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import BinaryIO
 
-import pandas as pd
 import requests
-from sodapy import Socrata
+
+try:  # Serializador JSON en Rust; sin él se usa el módulo json estándar
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from _http import build_session, cached_download
 
 # === CONFIGURACIÓN ===
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,7 +47,16 @@ DATA_DIR = BASE_DIR / "data" / "bronze"
 
 SOCRATA_DOMAIN = "www.datos.gov.co"
 SOCRATA_TOKEN: str | None = None
-CLIENT = Socrata(SOCRATA_DOMAIN, SOCRATA_TOKEN)
+SOCRATA_RESOURCE_URL = f"https://{SOCRATA_DOMAIN}/resource/{{dataset_id}}.json"
+
+# Descarga paginada en paralelo: páginas $offset/$limit sobre un pool de
+# conexiones compartido (el trabajo es espera de red, los hilos bastan)
+PAGE_SIZE = 50_000
+MAX_WORKERS = 8
+
+SESSION = build_session()
+if SOCRATA_TOKEN:
+    SESSION.headers["X-App-Token"] = SOCRATA_TOKEN
 
 # Datasets de delitos con sus IDs de Socrata
 DATASETS: dict[str, str] = {
@@ -55,9 +72,35 @@ DATASETS: dict[str, str] = {
     "delitos_informaticos": "4v6r-wu98",
 }
 
+# Serialización de un registro a JSON UTF-8 compacto. El encoder de json se
+# crea una sola vez (json.dumps con opciones crea uno nuevo en cada llamada)
+if orjson is not None:
+    dump_record = orjson.dumps
+else:
+    _ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dump_record(record: dict) -> bytes:
+        return _ENCODER.encode(record).encode("utf-8")
+
+
 # Código departamento Santander
 SANTANDER_CODE = "68"
 
+# Filtro SoQL según la columna de departamento (en orden de preferencia)
+DEPT_FILTERS: dict[str, str] = {
+    "departamento": "upper(departamento) = 'SANTANDER'",
+    "departamento_hecho": "upper(departamento_hecho) = 'SANTANDER'",
+    "cod_depto": f"cod_depto = '{SANTANDER_CODE}'",
+    "codigo_dane": f"starts_with(codigo_dane, '{SANTANDER_CODE}')",
+}
+
+# Columna de departamento de cada dataset (ID Socrata -> columna, None si no
+# tiene). Los IDs son fijos: lo que falte se descubre una sola vez con un
+# registro de muestra y se guarda en SCHEMA_CACHE_PATH para las siguientes
+# ejecuciones.
+DATASET_DEPT_COLUMN: dict[str, str | None] = {}
+SCHEMA_CACHE_PATH = BASE_DIR / "data" / ".socrata_schema.json"
+
 
 def ensure_folder(path: Path) -> None:
     """Crea directorio si no existe."""
@@ -67,13 +110,149 @@ def ensure_folder(path: Path) -> None:
 # ---------------------------------------------------------
 # 1. EXTRACCIÓN SOCRATA (DATOS.GOV.CO) - SOLO SANTANDER
 # ---------------------------------------------------------
+def socrata_get(dataset_id: str, params: dict[str, str | int]) -> list[dict]:
+    """Consulta SoQL sobre el endpoint /resource/{id}.json de Socrata."""
+    response = SESSION.get(
+        SOCRATA_RESOURCE_URL.format(dataset_id=dataset_id),
+        params=params,
+        timeout=120,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def load_schema_cache() -> None:
+    """Completa DATASET_DEPT_COLUMN con lo aprendido en ejecuciones previas."""
+    try:
+        cached = json.loads(SCHEMA_CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    for dataset_id, column in cached.items():
+        DATASET_DEPT_COLUMN.setdefault(dataset_id, column)
+
+
+def save_schema_cache() -> None:
+    """Persiste DATASET_DEPT_COLUMN para omitir el sniff en la próxima ejecución."""
+    SCHEMA_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SCHEMA_CACHE_PATH.write_text(
+        json.dumps(DATASET_DEPT_COLUMN, indent=2, sort_keys=True), encoding="utf-8"
+    )
+
+
+def sniff_dept_column(dataset_id: str) -> tuple[str | None, list[str]]:
+    """
+    Pide un registro de muestra para ver la estructura del dataset.
+
+    Retorna (columna de departamento o None, columnas de la muestra).
+    """
+    sample = socrata_get(dataset_id, {"$limit": 1})
+    if not sample:
+        return None, []
+
+    columns = list(sample[0].keys())
+    column = next((col for col in DEPT_FILTERS if col in columns), None)
+    return column, columns
+
+
+def count_records(dataset_id: str, dept_filter: str | None) -> int:
+    """Total de registros del dataset que cumplen `dept_filter`."""
+    params: dict[str, str | int] = {"$select": "count(*)"}
+    if dept_filter:
+        params["$where"] = dept_filter
+    count = socrata_get(dataset_id, params)
+    return int(next(iter(count[0].values()))) if count else 0
+
+
+def plan_dataset(dataset_id: str) -> tuple[str | None, int, list[str] | None]:
+    """
+    Determina el filtro de departamento y el total de registros a descargar.
+
+    La columna de departamento se toma de DATASET_DEPT_COLUMN; solo si el
+    dataset no está ahí se pide un registro de muestra (y el resultado se
+    guarda en el diccionario). Si la columna conocida ya no existe (la API
+    responde 400) se vuelve a inspeccionar el dataset.
+
+    Retorna (dept_filter, total, columnas de la muestra). Las columnas son
+    None cuando no hubo muestra y [] si el dataset está vacío.
+    """
+    columns: list[str] | None = None
+    if dataset_id in DATASET_DEPT_COLUMN:
+        column = DATASET_DEPT_COLUMN[dataset_id]
+    else:
+        column, columns = sniff_dept_column(dataset_id)
+        if not columns:
+            return None, 0, columns
+
+    dept_filter = DEPT_FILTERS[column] if column else None
+    try:
+        total = count_records(dataset_id, dept_filter)
+    except requests.HTTPError as exc:
+        if columns is not None or exc.response is None or exc.response.status_code != 400:
+            raise
+        column, columns = sniff_dept_column(dataset_id)
+        if not columns:
+            return None, 0, columns
+        dept_filter = DEPT_FILTERS[column] if column else None
+        total = count_records(dataset_id, dept_filter)
+
+    DATASET_DEPT_COLUMN[dataset_id] = column
+    return dept_filter, total, columns
+
+
+def fetch_page(dataset_id: str, dept_filter: str | None, offset: int) -> list[dict]:
+    """Descarga una página de registros (orden estable por :id)."""
+    params: dict[str, str | int] = {
+        "$limit": PAGE_SIZE,
+        "$offset": offset,
+        "$order": ":id",
+    }
+    if dept_filter:
+        params["$where"] = dept_filter
+    return socrata_get(dataset_id, params)
+
+
+def open_json_stream(output_path: Path) -> BinaryIO:
+    """
+    Abre un archivo temporal para escribir un arreglo JSON de registros.
+
+    Los registros se escriben página a página (ver write_json_records) y el
+    archivo solo toma su nombre final al cerrarse con close_json_stream, así
+    los scripts Silver nunca leen un JSON a medias.
+    """
+    fh = open(output_path.with_suffix(".json.tmp"), "wb")
+    fh.write(b"[")
+    return fh
+
+
+def write_json_records(fh: BinaryIO, records: list[dict], first: bool) -> None:
+    """Agrega registros al arreglo JSON abierto (un registro por línea)."""
+    if not records:
+        return
+    fh.write(b"\n" if first else b",\n")
+    fh.write(b",\n".join(map(dump_record, records)))
+
+
+def close_json_stream(fh: BinaryIO, output_path: Path, n_rows: int) -> None:
+    """Cierra el arreglo JSON; sin registros, descarta el archivo."""
+    fh.write(b"\n]\n")
+    fh.close()
+    tmp_path = Path(fh.name)
+    if n_rows:
+        tmp_path.replace(output_path)
+    else:
+        tmp_path.unlink()
+
+
 def extract_socrata() -> None:
     """
     Extrae datasets de Socrata API (datos.gov.co).
     Filtra SOLO registros del departamento de SANTANDER.
-    
-    IMPORTANTE: Usamos get_all() para obtener TODOS los registros.
-    El método get() por defecto solo retorna 1000 registros.
+
+    IMPORTANTE: se descargan TODOS los registros paginando con
+    $offset/$limit (por defecto la API solo retorna 1000).
+    Todos los datasets y sus páginas se piden en paralelo. Cada página se
+    escribe al JSON de su dataset en cuanto llegan las anteriores, sin armar
+    un DataFrame ni retener el dataset completo en memoria.
     """
     print("=" * 60)
     print("📦 EXTRACCIÓN BRONZE - SOCRATA API")
@@ -82,58 +261,101 @@ def extract_socrata() -> None:
 
     output_dir = DATA_DIR / "socrata_api"
     ensure_folder(output_dir)
+    load_schema_cache()
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        # 1. Filtro y total de registros de cada dataset
+        plans = {
+            pool.submit(plan_dataset, dataset_id): name
+            for name, dataset_id in DATASETS.items()
+        }
+
+        # Estado de escritura por dataset: archivo abierto, páginas recibidas
+        # fuera de orden, siguiente página a escribir y registros escritos
+        streams: dict[str, dict] = {}
+        page_futures = {}
+        for future in as_completed(plans):
+            name = plans[future]
+            dataset_id = DATASETS[name]
+            print(f"\n📊 Descargando: {name} ({dataset_id})...")
+            try:
+                dept_filter, total, columns = future.result()
+            except Exception as exc:  # noqa: BLE001
+                print(f"  [{name}] ❌ Error: {exc}")
+                continue
 
-    for name, dataset_id in DATASETS.items():
-        print(f"\n📊 Descargando: {name} ({dataset_id})...")
-        try:
-            # Primero obtenemos una muestra para ver la estructura
-            sample = CLIENT.get(dataset_id, limit=1)
-            if not sample:
-                print("  ⚠️ Dataset vacío")
+            if columns == []:
+                print(f"  [{name}] ⚠️ Dataset vacío")
                 continue
 
-            columns = list(sample[0].keys())
+            if dept_filter:
+                print(f"  [{name}] Filtro: {dept_filter}")
+            else:
+                print(f"  [{name}] ⚠️ No se encontró columna de departamento, descargando todo...")
+                if columns:
+                    print(f"  [{name}] Columnas disponibles: {columns}")
 
-            # Determinar columna de departamento según estructura
-            dept_filter: str | None = None
+            if total == 0:
+                print(f"  [{name}] ⚠️ Sin registros para Santander")
+                continue
 
-            if "departamento" in columns:
-                dept_filter = "upper(departamento) = 'SANTANDER'"
-            elif "departamento_hecho" in columns:
-                dept_filter = "upper(departamento_hecho) = 'SANTANDER'"
-            elif "cod_depto" in columns:
-                dept_filter = f"cod_depto = '{SANTANDER_CODE}'"
-            elif "codigo_dane" in columns:
-                dept_filter = f"starts_with(codigo_dane, '{SANTANDER_CODE}')"
+            # 2. Una tarea por página
+            output_path = output_dir / f"{name}.json"
+            offsets = range(0, total, PAGE_SIZE)
+            streams[name] = {
+                "fh": open_json_stream(output_path),
+                "path": output_path,
+                "pending": {},
+                "next": 0,
+                "n_pages": len(offsets),
+                "rows": 0,
+            }
+            for idx, offset in enumerate(offsets):
+                fut = pool.submit(fetch_page, dataset_id, dept_filter, offset)
+                page_futures[fut] = (name, idx)
+
+        save_schema_cache()
+
+        # 3. Se escriben las páginas en orden a medida que están disponibles
+        for future in as_completed(page_futures):
+            name, idx = page_futures[future]
+            stream = streams.get(name)
+            if stream is None:  # dataset descartado por un error previo
+                continue
+            try:
+                stream["pending"][idx] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                print(f"  [{name}] ❌ Error: {exc}")
+                close_json_stream(stream["fh"], stream["path"], 0)
+                del streams[name]
+                continue
 
-            if dept_filter:
-                print(f"  Filtro: {dept_filter}")
-                results = CLIENT.get_all(dataset_id, where=dept_filter)
-            else:
-                print("  ⚠️ No se encontró columna de departamento, descargando todo...")
-                print(f"  Columnas disponibles: {columns}")
-                results = CLIENT.get_all(dataset_id)
-
-            results_list = list(results)
-            print(f"  Registros Santander: {len(results_list):,}")
-
-            if results_list:
-                df = pd.DataFrame.from_records(results_list)
-                output_path = output_dir / f"{name}.json"
-                df.to_json(output_path, orient="records", force_ascii=False, indent=2)
-                print(f"  ✔ Guardado en: {output_path}")
-            else:
-                print("  ⚠️ Sin registros para Santander")
+            while stream["next"] in stream["pending"]:
+                records = stream["pending"].pop(stream["next"])
+                write_json_records(stream["fh"], records, first=stream["rows"] == 0)
+                stream["rows"] += len(records)
+                stream["next"] += 1
 
-        except Exception as exc:  # noqa: BLE001
-            print(f"  ❌ Error: {exc}")
+            if stream["next"] == stream["n_pages"]:
+                close_json_stream(stream["fh"], stream["path"], stream["rows"])
+                del streams[name]
+                print(f"  [{name}] Registros Santander: {stream['rows']:,}")
+                if stream["rows"]:
+                    print(f"  [{name}] ✔ Guardado en: {stream['path']}")
+                else:
+                    print(f"  [{name}] ⚠️ Sin registros para Santander")
 
 
 # ---------------------------------------------------------
 # 2. EXTRACCIÓN DANE (EXCEL DIRECTO)
 # ---------------------------------------------------------
 def extract_dane() -> None:
-    """Descarga el archivo DIVIPOLA 2010 desde el DANE."""
+    """
+    Descarga el archivo DIVIPOLA 2010 desde el DANE.
+
+    La descarga es condicional (ETag / Last-Modified): si el archivo no
+    cambió en el servidor se conserva el existente.
+    """
     print("\n" + "=" * 60)
     print("📦 EXTRACCIÓN DANE - DIVIPOLA")
     print("=" * 60)
@@ -148,10 +370,10 @@ def extract_dane() -> None:
     output_path = output_dir / "divipola_2010.xls"
 
     try:
-        response = requests.get(url, verify=False, timeout=60)  # noqa: S501
-        response.raise_for_status()
-        output_path.write_bytes(response.content)
-        print(f"  ✔ DANE DIVIPOLA guardado en: {output_path}")
+        if cached_download(url, output_path, SESSION, timeout=60):
+            print(f"  ✔ DANE DIVIPOLA guardado en: {output_path}")
+        else:
+            print(f"  ✔ DANE DIVIPOLA sin cambios (HTTP 304): {output_path}")
     except Exception as exc:  # noqa: BLE001
         print(f"  ❌ Error en descarga DANE: {exc}")
 
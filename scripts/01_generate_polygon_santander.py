@@ -2,20 +2,29 @@
 01_generate_polygon_santander.py
 =================================
 
-Descarga y genera el GeoJSON de municipios de Santander desde un repositorio público.
+Descarga el GeoJSON nacional de municipios desde un repositorio público y
+guarda los de Santander como GeoParquet.
 
 Entrada:
     No requiere archivos de entrada. Consume un GeoJSON remoto.
 
 Salida:
-    data/bronze/dane_geo/santander_municipios.geojson
+    data/bronze/dane_geo/santander_municipios.parquet
 """
 
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import geopandas as gpd
 import requests
 
+try:  # Parser JSON incremental; sin él se carga el GeoJSON completo
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+from _http import conditional_get, save_http_meta
+
 # === CONFIGURACIÓN ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,41 +41,83 @@ def ensure_folder(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def download_geojson(url: str) -> dict:
-    """Descarga un GeoJSON remoto y lo retorna como diccionario."""
+def download_geojson(url: str, output_path: Path) -> requests.Response | None:
+    """
+    Descarga un GeoJSON remoto con GET condicional respecto a `output_path`.
+
+    Retorna None si el GeoJSON remoto no cambió desde la última generación
+    (HTTP 304) y, en caso contrario, la respuesta sin consumir (stream=True)
+    para leerla con iter_features.
+    """
     print("➤ Descargando GeoJSON desde GitHub...")
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
-    print("✔ GeoJSON descargado correctamente")
-    return response.json()
+    return conditional_get(url, output_path, timeout=60, stream=True)
 
 
-def filter_santander_municipalities(geojson_data: dict) -> gpd.GeoDataFrame:
-    """Filtra los municipios del departamento de Santander (código 68)."""
-    print("➤ Convirtiendo a GeoDataFrame...")
-    gdf = gpd.GeoDataFrame.from_features(geojson_data["features"])
+def iter_features(response: requests.Response) -> Iterator[dict]:
+    """
+    Recorre los features del GeoJSON a medida que llegan por la red.
+
+    Con ijson el FeatureCollection nacional nunca se materializa completo:
+    cada feature se construye, se filtra y se descarta. Sin ijson se
+    recurre a response.json().
+    """
+    if ijson is None:
+        yield from response.json()["features"]
+        return
+
+    # Descomprime gzip/deflate si el servidor lo aplicó
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "features.item", use_float=True)
 
+
+def filter_santander_municipalities(features: Iterable[dict]) -> gpd.GeoDataFrame:
+    """
+    Filtra los municipios del departamento de Santander (código 68).
+
+    El filtro se aplica sobre los features del GeoJSON antes de construir
+    el GeoDataFrame, así solo se crean las geometrías de Santander.
+    """
     print("➤ Filtrando municipios del departamento de Santander (DPTO_CCDGO = '68')...")
-    gdf_santander = gdf[gdf["DPTO_CCDGO"] == "68"].copy()
+    features = [
+        feature
+        for feature in features
+        if feature["properties"].get("DPTO_CCDGO") == "68"
+    ]
+    print("✔ GeoJSON descargado correctamente")
+
+    print("➤ Convirtiendo a GeoDataFrame...")
+    gdf_santander = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
 
     print(f"✔ Total municipios encontrados: {gdf_santander.shape[0]}")
     return gdf_santander
 
 
-def save_geojson(gdf_santander: gpd.GeoDataFrame, output_path: Path) -> None:
-    """Guarda el GeoDataFrame de Santander en formato GeoJSON."""
+def save_geoparquet(gdf_santander: gpd.GeoDataFrame, output_path: Path) -> None:
+    """
+    Guarda el GeoDataFrame de Santander en formato GeoParquet.
+
+    Binario y columnar: más liviano y rápido de releer que el GeoJSON en
+    texto. La geometría va al final, como la devolvía gpd.read_file.
+    """
     ensure_folder(output_path.parent)
-    print(f"➤ Guardando GeoJSON en: {output_path}")
-    gdf_santander.to_file(output_path, driver="GeoJSON")
-    print("✔ GeoJSON guardado correctamente")
+    print(f"➤ Guardando GeoParquet en: {output_path}")
+    columns = [c for c in gdf_santander.columns if c != "geometry"] + ["geometry"]
+    gdf_santander[columns].to_parquet(output_path, index=False)
+    print("✔ GeoParquet guardado correctamente")
 
 
 def generate_santander_polygon() -> None:
     """Orquesta la descarga, filtrado y guardado de los municipios de Santander."""
-    geojson_data = download_geojson(GITHUB_GEOJSON_URL)
-    gdf_santander = filter_santander_municipalities(geojson_data)
-    output_path = DATA_DIR / "santander_municipios.geojson"
-    save_geojson(gdf_santander, output_path)
+    output_path = DATA_DIR / "santander_municipios.parquet"
+    response = download_geojson(GITHUB_GEOJSON_URL, output_path)
+    if response is None:
+        print(f"✔ GeoJSON remoto sin cambios (HTTP 304); se conserva: {output_path}")
+        return
+
+    with response:
+        gdf_santander = filter_santander_municipalities(iter_features(response))
+    save_geoparquet(gdf_santander, output_path)
+    save_http_meta(output_path, response)
 
 
 def main() -> None:
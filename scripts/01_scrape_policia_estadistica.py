@@ -14,11 +14,14 @@ Salida:
 import re
 import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from _http import build_session, stream_to_file
 
 # === CONFIGURACIÓN ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
@@ -28,6 +31,24 @@ OUTPUT_DIR = DATA_DIR / "policia_scraping"
 
 BASE_URL = "https://www.policia.gov.co/estadistica-delictiva"
 
+# Descargas simultáneas de archivos dentro de una misma página
+MAX_DOWNLOAD_WORKERS = 8
+
+# lxml (en C) si está instalado; si no, el parser de la librería estándar
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:  # pragma: no cover
+    HTML_PARSER = "html.parser"
+
+# slugify: marcas diacríticas (tras NFKD) y grupos no alfanuméricos
+_COMBINING_RE = re.compile("[\u0300-\u036f]")
+_SLUG_RE = re.compile(r"[^0-9A-Za-z]+")
+
+# Solo se construyen las tablas y los enlaces; el resto del DOM se descarta
+PAGE_STRAINER = SoupStrainer(["table", "a"])
+
 
 def ensure_folder(path: Path) -> None:
     """Crea directorio si no existe."""
@@ -41,15 +62,18 @@ def slugify(text: str) -> str:
     - Conserva solo letras y números
     - Reemplaza grupos de caracteres no alfanuméricos con guion bajo (_)
     """
-    text = unicodedata.normalize("NFKD", text)
-    text = "".join(char for char in text if not unicodedata.combining(char))
-    text = re.sub(r"[^0-9A-Za-z]+", "_", text)
-    return text.strip("_")
+    text = _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text))
+    return _SLUG_RE.sub("_", text).strip("_")
 
 
 def create_session() -> requests.Session:
-    """Crea una sesión HTTP configurada con un User-Agent estándar."""
-    session = requests.Session()
+    """
+    Crea una sesión HTTP configurada con un User-Agent estándar.
+
+    El pool de conexiones admite las descargas en paralelo de una página y
+    los errores transitorios se reintentan con backoff (ver _http.RETRY).
+    """
+    session = build_session()
     session.headers.update(
         {
             "User-Agent": (
@@ -76,17 +100,24 @@ def get_page_html(session: requests.Session, page_number: int) -> str:
     return response.text
 
 
-def parse_table_rows(html: str) -> list[tuple[str, str, str]]:
+def parse_page(html: str) -> BeautifulSoup:
     """
-    Retorna una lista de tuplas (delito, año, download_url) para una página.
+    Parsea una página una sola vez, conservando solo <table> y <a>.
+
+    El resultado alimenta tanto a parse_table_rows como a has_next_page.
     """
-    soup = BeautifulSoup(html, "html.parser")
+    return BeautifulSoup(html, HTML_PARSER, parse_only=PAGE_STRAINER)
+
 
-    # Contenedor principal donde vive la tabla
-    container = soup.find("div", class_="table-responsive")
-    if container is not None:
-        table = container.find("table")
-    else:
+def parse_table_rows(soup: BeautifulSoup) -> list[tuple[str, str, str]]:
+    """
+    Retorna una lista de tuplas (delito, año, download_url) para una página.
+    """
+    # La tabla de archivos es la que trae enlaces <a class="file-link">
+    # (el contenedor div.table-responsive no se conserva al parsear).
+    link = soup.find("a", class_="file-link")
+    table = link.find_parent("table") if link is not None else None
+    if table is None:
         # Como alternativa, usar la primera tabla de la página si cambia la clase.
         table = soup.find("table")
 
@@ -117,12 +148,11 @@ def parse_table_rows(html: str) -> list[tuple[str, str, str]]:
     return rows
 
 
-def has_next_page(html: str) -> bool:
+def has_next_page(soup: BeautifulSoup) -> bool:
     """
     Determina si la página tiene un enlace de paginación 'Siguiente'
     (un <a> con rel="next").
     """
-    soup = BeautifulSoup(html, "html.parser")
     return soup.find("a", rel="next") is not None
 
 
@@ -155,52 +185,73 @@ def download_file(
         return dest_path
 
     print(f"{prefix}[DL  ] {year} | {crime} -> {url}")
-    response = session.get(url, timeout=60)
-    response.raise_for_status()
-
-    dest_path.write_bytes(response.content)
+    # Descarga en streaming: el Excel va a disco por bloques
+    response = session.get(url, stream=True, timeout=60)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    stream_to_file(response, dest_path)
     print(f"{prefix}[OK  ] Guardado: {dest_path}")
     return dest_path
 
 
 def run_scraping() -> None:
-    """Ejecuta el proceso completo de scraping y descarga de archivos."""
+    """
+    Ejecuta el proceso completo de scraping y descarga de archivos.
+
+    Las páginas se recorren en orden; los archivos de cada página se
+    descargan en paralelo con un pool de hilos que comparte la sesión.
+    """
     session = create_session()
 
     total_files = 0
     page = 0
 
-    while True:
-        print(f"\n=== Procesando página {page} ===")
-        html = get_page_html(session, page)
-        rows = parse_table_rows(html)
-
-        if not rows:
-            print("No se encontraron filas en esta página. Deteniendo scraping.")
-            break
-
-        print(f"Se encontraron {len(rows)} archivos en la página {page}.")
-
-        for crime, year, url in rows:
-            try:
-                total_files += 1
-                download_file(session, crime, year, url, index=total_files)
-            except Exception as exc:  # noqa: BLE001
-                print(
-                    f"[ERR] Error en archivo {total_files} "
-                    f"({crime} {year} {url}): {exc}",
-                )
+    with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as pool:
+        while True:
+            print(f"\n=== Procesando página {page} ===")
+            soup = parse_page(get_page_html(session, page))
+            rows = parse_table_rows(soup)
 
-        # Si no hay botón "Siguiente", terminamos
-        if not has_next_page(html):
-            print("No se encontró enlace 'Siguiente'. Fin de la paginación.")
-            break
+            if not rows:
+                print("No se encontraron filas en esta página. Deteniendo scraping.")
+                break
 
-        # Se avanza a la siguiente página
-        page += 1
+            print(f"Se encontraron {len(rows)} archivos en la página {page}.")
 
-        # Tiempo de espera para no saturar el servidor
-        time.sleep(1)
+            futures = {
+                pool.submit(download_file, session, crime, year, url, index): (
+                    index,
+                    crime,
+                    year,
+                    url,
+                )
+                for index, (crime, year, url) in enumerate(rows, start=total_files + 1)
+            }
+            total_files += len(rows)
+
+            for future in as_completed(futures):
+                index, crime, year, url = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:  # noqa: BLE001
+                    print(
+                        f"[ERR] Error en archivo {index} "
+                        f"({crime} {year} {url}): {exc}",
+                    )
+
+            # Si no hay botón "Siguiente", terminamos
+            if not has_next_page(soup):
+                print("No se encontró enlace 'Siguiente'. Fin de la paginación.")
+                break
+
+            # Se avanza a la siguiente página
+            page += 1
+
+            # Tiempo de espera para no saturar el servidor
+            time.sleep(1)
 
     print(f"\nCompletado. Total de archivos procesados: {total_files}")
 
@@ -12,11 +12,21 @@ Salida:
     data/silver/poblacion/poblacion_santander.parquet
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import re
 import zipfile
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+
+from _parquet import PARQUET_OPTIONS
+
+# Copy-on-Write: los filtros y renombres comparten memoria con el DataFrame
+# de origen hasta que se modifica una columna (sin copias completas previas)
+pd.options.mode.copy_on_write = True
 
 # === CONFIGURACIÓN ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
@@ -30,6 +40,22 @@ ARCHIVO_INTERNO_2005 = "TerriData_Pob_2005.txt"
 ARCHIVO_INTERNO_2018 = "TerriData_Pob_2018.txt"
 INPUT_SEPARATOR = "|"
 DEPARTAMENTO_FILTRO = "Santander"
+# Años tomados del Censo 2005 (como texto, igual que la columna "Año")
+ANIOS_CENSO_2005 = [str(anio) for anio in range(2010, 2018)]
+# Grupos de edad por edad mínima del indicador: (-inf, 11], (11, 17], (17, inf)
+LIMITES_EDAD = [-np.inf, 11, 17, np.inf]
+GRUPOS_EDAD = ["MENORES", "ADOLESCENTES", "ADULTOS"]
+# Columnas de TerriData que usa el procesamiento (el resto no se convierte)
+COLUMNAS_TERRIDATA = [
+    "Código Entidad",
+    "Entidad",
+    "Departamento",
+    "Año",
+    "Mes",
+    "Dato Numérico",
+    "Indicador",
+    "Unidad de Medida",
+]
 
 # Salida
 OUTPUT_DIR = BASE_DIR / "data" / "silver" / "poblacion"
@@ -41,17 +67,60 @@ def ensure_folder(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def read_terridata(zip_path: Path, archivo_interno: str) -> pd.DataFrame:
+    """
+    Lee un TXT de TerriData (separado por "|") directamente desde su ZIP.
+
+    Usa el lector CSV multihilo de PyArrow. Solo se convierten las columnas
+    de COLUMNAS_TERRIDATA, todas como texto y con las celdas vacías nulas
+    (igual que pd.read_csv(dtype=str)). Las filas de otros departamentos se
+    descartan en Arrow junto con los indicadores de porcentaje, así a pandas
+    solo llegan las filas útiles de DEPARTAMENTO_FILTRO, como columnas
+    string[pyarrow] que reutilizan los buffers de Arrow.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        with zf.open(archivo_interno) as f:
+            # El encabezado fija los nombres para declarar todas como string
+            columnas = f.readline().decode("utf-8").rstrip("\r\n").split(INPUT_SEPARATOR)
+            tabla = pacsv.read_csv(
+                f,
+                read_options=pacsv.ReadOptions(column_names=columnas),
+                parse_options=pacsv.ParseOptions(delimiter=INPUT_SEPARATOR),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={c: pa.string() for c in COLUMNAS_TERRIDATA},
+                    include_columns=COLUMNAS_TERRIDATA,
+                    strings_can_be_null=True,
+                    null_values=[""],
+                ),
+            )
+    # Solo el departamento y sin los indicadores de porcentaje (un
+    # Indicador nulo se conserva)
+    es_porcentaje = pc.fill_null(
+        pc.match_substring(tabla["Indicador"], "Porcentaje", ignore_case=True),
+        False,
+    )
+    tabla = tabla.filter(
+        pc.and_(
+            pc.equal(tabla["Departamento"], DEPARTAMENTO_FILTRO),
+            pc.invert(es_porcentaje),
+        )
+    )
+    return tabla.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
 def load_poblacion_data() -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Carga los archivos de población del DANE desde archivos ZIP comprimidos."""
-    print("Cargando archivo Censo 2005 desde ZIP...")
-    with zipfile.ZipFile(INPUT_POB_2005_ZIP, 'r') as zf:
-        with zf.open(ARCHIVO_INTERNO_2005) as f:
-            poblacion_2005 = pd.read_csv(f, sep=INPUT_SEPARATOR, dtype=str)
-    
-    print("Cargando archivo Censo 2018 desde ZIP...")
-    with zipfile.ZipFile(INPUT_POB_2018_ZIP, 'r') as zf:
-        with zf.open(ARCHIVO_INTERNO_2018) as f:
-            poblacion_2018 = pd.read_csv(f, sep=INPUT_SEPARATOR, dtype=str)
+    """
+    Carga los archivos de población del DANE desde archivos ZIP comprimidos.
+
+    Los dos censos se leen en paralelo: la descompresión (zlib) y el parseo
+    (PyArrow) liberan el GIL, así cada archivo avanza en su propio núcleo.
+    """
+    print("Cargando archivos Censo 2005 y Censo 2018 desde ZIP...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futuro_2005 = pool.submit(read_terridata, INPUT_POB_2005_ZIP, ARCHIVO_INTERNO_2005)
+        futuro_2018 = pool.submit(read_terridata, INPUT_POB_2018_ZIP, ARCHIVO_INTERNO_2018)
+        poblacion_2005 = futuro_2005.result()
+        poblacion_2018 = futuro_2018.result()
     
     return poblacion_2005, poblacion_2018
 
@@ -65,6 +134,8 @@ def limpiar_df(df: pd.DataFrame) -> pd.DataFrame:
         - Conversión de tipos
         - Clasificación de edades
         - Estandarización de género
+
+    Los indicadores de porcentaje ya vienen descartados por read_terridata.
     """
     # Renombrar
     df = df.rename(columns={
@@ -78,48 +149,70 @@ def limpiar_df(df: pd.DataFrame) -> pd.DataFrame:
         "Unidad de Medida": "genero"
     })
 
-    # Números
-    df["n_poblacion"] = (
-        df["n_poblacion"]
-            .str.replace(".", "", regex=False)
-            .str.replace(",", ".", regex=False)
-            .astype(float)
-            .round()
-            .astype(int)
-    )
+    # Números: formato "32.346,00" (miles con punto, decimales con coma).
+    # Se convierten con kernels de Arrow sobre el buffer de texto, sin
+    # pasar por Series intermedias de pandas.
+    n_poblacion = pa.array(df["n_poblacion"], type=pa.string())
+    n_poblacion = pc.replace_substring(n_poblacion, ".", "")
+    n_poblacion = pc.replace_substring(n_poblacion, ",", ".")
+    n_poblacion = pc.round(pc.cast(n_poblacion, pa.float64()))
+    df["n_poblacion"] = pc.cast(n_poblacion, pa.int64()).to_numpy()
 
     # Género
-    df["genero"] = (
-        df["genero"]
-            .fillna("")
-            .str.lower()
-            .apply(lambda x: "MASCULINO" if "hombre" in x else
-                             "FEMENINO" if "mujer" in x else None)
+    genero = df["genero"].fillna("").str.lower()
+    df["genero"] = np.select(
+        [
+            genero.str.contains("hombre", regex=False),
+            genero.str.contains("mujer", regex=False),
+        ],
+        ["MASCULINO", "FEMENINO"],
+        default=None,
     )
 
-    # Eliminar porcentajes
-    df = df[~df["edad"].str.contains("Porcentaje", case=False, na=False)]
+    # Extraer edad mínima (primer número del indicador)
+    df["edad_min"] = df["edad"].str.extract(r"(\d+)", expand=False).astype("Int64")
 
-    # Extraer edad mínima
-    def extraer_edad_min(texto: str) -> int | None:
-        edades = re.findall(r"\d+", texto)
-        return int(edades[0]) if edades else None
+    # Clasificar edad por intervalos (un indicador sin número, NaN, no cae
+    # en ningún intervalo y queda en ADULTOS)
+    df["grupo_edad"] = (
+        pd.cut(df["edad_min"], bins=LIMITES_EDAD, labels=GRUPOS_EDAD)
+        .astype(object)
+        .fillna(GRUPOS_EDAD[-1])
+    )
 
-    df["edad_min"] = df["edad"].apply(extraer_edad_min)
+    return df
 
-    # Clasificar edad
-    def clasificar_edad(e: int | None) -> str | None:
-        if e is None:
-            return None
-        if e <= 11:
-            return "MENORES"
-        elif 12 <= e <= 17:
-            return "ADOLESCENTES"
-        return "ADULTOS"
 
-    df["grupo_edad"] = df["edad_min"].apply(clasificar_edad)
+def sumar_por_llaves(df: pd.DataFrame, llaves: list[str], valor: str) -> pd.DataFrame:
+    """
+    Equivalente a df.groupby(llaves)[valor].sum().reset_index() sobre
+    códigos enteros.
 
-    return df
+    Cada llave se codifica como categórica (categorías ordenadas) y los
+    códigos se combinan en una sola llave entera; un argsort estable y
+    np.add.reduceat suman cada grupo. Las filas con alguna llave nula se
+    descartan y el resultado queda ordenado por las llaves, como en groupby.
+    """
+    categoricas = [pd.Categorical(df[c]) for c in llaves]
+    codigos = np.stack([cat.codes for cat in categoricas])
+    dims = tuple(len(cat.categories) for cat in categoricas)
+
+    completas = (codigos >= 0).all(axis=0)
+    llave = np.ravel_multi_index(codigos[:, completas], dims)
+    valores = df[valor].to_numpy()[completas]
+
+    orden = np.argsort(llave, kind="stable")
+    llave = llave[orden]
+    inicios = np.flatnonzero(np.diff(llave, prepend=-1))
+    sumas = np.add.reduceat(valores[orden], inicios) if len(inicios) else valores[:0]
+
+    grupos = np.unravel_index(llave[inicios], dims)
+    resultado = {
+        c: cat.categories.to_numpy(dtype=object)[g]
+        for c, cat, g in zip(llaves, categoricas, grupos)
+    }
+    resultado[valor] = sumas
+    return pd.DataFrame(resultado)
 
 
 def process_poblacion(
@@ -141,15 +234,15 @@ def process_poblacion(
     # Procesar dataset 2018
     pob18_filtrado = poblacion_2018[
         poblacion_2018["Departamento"] == DEPARTAMENTO_FILTRO
-    ].copy()
+    ]
     pob18_filtrado = limpiar_df(pob18_filtrado)
     
     # Procesar dataset 2005 (años 2010-2017)
     print("Filtrando datos del Censo para Santander (2010–2017)...")
     pob05_filtrado = poblacion_2005[
         (poblacion_2005["Departamento"] == DEPARTAMENTO_FILTRO) &
-        (poblacion_2005["Año"].astype(int).between(2010, 2017))
-    ].copy()
+        (poblacion_2005["Año"].isin(ANIOS_CENSO_2005))
+    ]
     pob05_filtrado = limpiar_df(pob05_filtrado)
     
     # Concatenar datasets
@@ -158,12 +251,10 @@ def process_poblacion(
     
     # Agregación final
     print("Agregando datos por municipio, año, género y grupo de edad...")
-    pob_agg = (
-        poblacion_total.groupby(
-            ["codigo_municipio", "anio", "genero", "grupo_edad"]
-        )["n_poblacion"]
-        .sum()
-        .reset_index()
+    pob_agg = sumar_por_llaves(
+        poblacion_total,
+        ["codigo_municipio", "anio", "genero", "grupo_edad"],
+        "n_poblacion",
     )
     
     return pob_agg
@@ -181,7 +272,7 @@ def main() -> None:
     
     # Exportar
     print("Exportando datos agregados a archivo parquet...")
-    pob_agg.to_parquet(OUTPUT_FILE, index=False)
+    pob_agg.to_parquet(OUTPUT_FILE, engine="pyarrow", index=False, **PARQUET_OPTIONS)
     
     print(f"\n✔ Archivo parquet generado correctamente en:\n{OUTPUT_FILE}")
 
@@ -18,6 +18,8 @@ from pathlib import Path
 
 import pandas as pd
 
+from _parquet import PARQUET_OPTIONS
+
 # === CONFIGURACIÓN DE RUTAS ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -53,7 +55,7 @@ def load_excel(path: Path, label: str) -> pd.DataFrame:
     """Carga un archivo Excel desde la capa Bronze."""
     check_exists(path, label=label)
     print(f"➤ Cargando archivo Excel: {label}...")
-    df = pd.read_excel(path)
+    df = pd.read_excel(path, engine="calamine")
     print(f"✔ Datos cargados ({label}): {df.shape[0]} filas, {df.shape[1]} columnas")
     return df
 
@@ -62,7 +64,7 @@ def save_parquet(df: pd.DataFrame, output_path: Path, label: str) -> None:
     """Guarda un DataFrame en formato Parquet en la capa Silver."""
     ensure_folder(output_path.parent)
     print(f"➤ Guardando {label} en formato Parquet...")
-    df.to_parquet(output_path, index=False)
+    df.to_parquet(output_path, engine="pyarrow", index=False, **PARQUET_OPTIONS)
     print(f"✔ Archivo Parquet generado: {output_path}")
 
 
@@ -6,7 +6,7 @@ Procesa datos geográficos del DANE para la capa Silver.
 
 Entrada:
     data/bronze/dane_geo/divipola_2010.xls
-    data/bronze/dane_geo/santander_municipios.geojson
+    data/bronze/dane_geo/santander_municipios.parquet (GeoParquet)
 
 Salida:
     data/silver/dane_geo/divipola_silver.parquet
@@ -17,9 +17,17 @@ Salida:
 from pathlib import Path
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import unidecode
 
+from _columns import map_distinct
+from _parquet import PARQUET_OPTIONS
+
+# Copy-on-Write: los filtros y renombres comparten memoria con el DataFrame
+# de origen hasta que se modifica una columna (sin copias completas previas)
+pd.options.mode.copy_on_write = True
+
 # === CONFIGURACIÓN DE RUTAS ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,7 +35,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Rutas de entrada
 BRONZE_DIR = BASE_DIR / "data" / "bronze"
 DIVIPOLA_INPUT = BRONZE_DIR / "dane_geo" / "divipola_2010.xls"
-GEOJSON_INPUT = BRONZE_DIR / "dane_geo" / "santander_municipios.geojson"
+GEO_INPUT = BRONZE_DIR / "dane_geo" / "santander_municipios.parquet"
 
 # Rutas de salida
 SILVER_DIR = BASE_DIR / "data" / "silver" / "dane_geo"
@@ -68,6 +76,7 @@ def load_divipola(filepath: Path) -> pd.DataFrame:
         filepath,
         sheet_name="LISTADO_VIGENTES",
         header=2,
+        engine="calamine",
     )
     df = df.reset_index(drop=True)
     print(f"✔ DIVIPOLA cargado: {df.shape[0]} filas, {df.shape[1]} columnas")
@@ -76,12 +85,12 @@ def load_divipola(filepath: Path) -> pd.DataFrame:
 
 def load_santander_geojson(filepath: Path) -> gpd.GeoDataFrame:
     """
-    Lee el archivo GeoJSON de municipios de Santander con sus coordenadas.
+    Lee el GeoParquet de municipios de Santander con sus geometrías.
     """
-    check_exists(filepath, label="GeoJSON Santander")
-    print("➤ Cargando GeoJSON de municipios de Santander...")
-    gdf = gpd.read_file(filepath, encoding="utf-8")
-    print(f"✔ GeoJSON cargado: {gdf.shape[0]} filas, {gdf.shape[1]} columnas")
+    check_exists(filepath, label="GeoParquet Santander")
+    print("➤ Cargando GeoParquet de municipios de Santander...")
+    gdf = gpd.read_parquet(filepath)
+    print(f"✔ GeoParquet cargado: {gdf.shape[0]} filas, {gdf.shape[1]} columnas")
     return gdf
 
 
@@ -89,6 +98,17 @@ def load_santander_geojson(filepath: Path) -> gpd.GeoDataFrame:
 # Funciones de transformación
 # =========================================================
 
+def upper_ascii(series: pd.Series) -> pd.Series:
+    """
+    Pasa a mayúsculas y quita tildes (unidecode) una columna de nombres,
+    una vez por valor distinto (map_distinct); los nulos quedan como NaN.
+    """
+    return map_distinct(
+        series,
+        lambda name: np.nan if name is None else unidecode.unidecode(name.upper()),
+    )
+
+
 def transform_divipola_to_silver(df: pd.DataFrame) -> pd.DataFrame:
     """
     Filtra solo Santander, normaliza nombres y renombra columnas
@@ -97,18 +117,14 @@ def transform_divipola_to_silver(df: pd.DataFrame) -> pd.DataFrame:
     print("➤ Transformando DIVIPOLA para Santander...")
 
     # Filtrar solo Santander
-    df_santander = df[df["Nombre Departamento"].str.upper() == "SANTANDER"].copy()
+    df_santander = df[df["Nombre Departamento"].str.upper() == "SANTANDER"]
 
     # Normalización de nombres (departamento / municipio)
-    df_santander.loc[:, "Nombre Departamento"] = (
+    df_santander.loc[:, "Nombre Departamento"] = upper_ascii(
         df_santander["Nombre Departamento"]
-        .str.upper()
-        .map(unidecode.unidecode)
     )
-    df_santander.loc[:, "Nombre Municipio"] = (
+    df_santander.loc[:, "Nombre Municipio"] = upper_ascii(
         df_santander["Nombre Municipio"]
-        .str.upper()
-        .map(unidecode.unidecode)
     )
 
     # Renombrar columnas
@@ -137,7 +153,7 @@ def transform_geojson_to_silver(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     # Eliminar columnas no relevantes (si existen)
     cols_to_drop = {"MPIO_CCDGO", "MPIO_CRSLC", "MPIO_NANO"}
     cols_to_drop = [col for col in cols_to_drop if col in gdf.columns]
-    gdf_clean = gdf.drop(columns=cols_to_drop, errors="ignore").copy()
+    gdf_clean = gdf.drop(columns=cols_to_drop, errors="ignore")
 
     # Renombrar columnas
     rename_map = {
@@ -164,7 +180,7 @@ def save_divipola_silver(df: pd.DataFrame, parquet_path: Path) -> None:
     """
     ensure_folder(parquet_path.parent)
     print(f"➤ Guardando DIVIPOLA Silver en: {parquet_path}")
-    df.to_parquet(parquet_path, index=False)
+    df.to_parquet(parquet_path, engine="pyarrow", index=False, **PARQUET_OPTIONS)
     print("✔ DIVIPOLA Silver guardado correctamente")
 
 
@@ -179,11 +195,13 @@ def save_geography_silver(
     ensure_folder(parquet_path.parent)
 
     print(f"➤ Guardando Geografía Silver (Parquet) en: {parquet_path}")
-    gdf.to_parquet(parquet_path, index=False)
+    gdf.to_parquet(parquet_path, index=False, **PARQUET_OPTIONS)
     print("✔ Geografía Silver (Parquet) guardada correctamente")
 
     print(f"➤ Guardando Geografía Silver (GeoJSON) en: {geojson_path}")
-    gdf.to_file(geojson_path, driver="GeoJSON")
+    # pyogrio con use_arrow pasa la tabla a GDAL en bloque (WKB vía Arrow)
+    # en lugar de serializar geometría por geometría desde Python
+    gdf.to_file(geojson_path, driver="GeoJSON", engine="pyogrio", use_arrow=True)
     print("✔ Geografía Silver (GeoJSON) guardada correctamente")
 
 
@@ -199,7 +217,7 @@ def main() -> None:
 
     # 1. Carga de datos
     divipola_df = load_divipola(DIVIPOLA_INPUT)
-    geojson_santander_gdf = load_santander_geojson(GEOJSON_INPUT)
+    geojson_santander_gdf = load_santander_geojson(GEO_INPUT)
 
     # 2. Transformaciones
     divipola_santander_df = transform_divipola_to_silver(divipola_df)
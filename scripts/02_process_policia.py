@@ -11,23 +11,142 @@ Salida:
     data/silver/policia_scraping/policia_santander.parquet
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List
 
 import pandas as pd
 
+from _columns import strip_upper
+from _parquet import PARQUET_OPTIONS
+
+# Copy-on-Write: filtros, selecciones de columnas y copias superficiales
+# comparten los datos hasta que una columna se modifica, así que ninguna de
+# las etapas necesita copiar el DataFrame completo
+pd.options.mode.copy_on_write = True
+
 # === CONFIGURACIÓN ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 BRONZE_POLICE_DIR = BASE_DIR / "data" / "bronze" / "policia_scraping"
 SILVER_POLICE_DIR = BASE_DIR / "data" / "silver" / "policia_scraping"
+
+# Procesos para leer los Excel en paralelo (el parseo es CPU-bound). Usa
+# todos los núcleos: run_pipeline.py ejecuta 02_process_policia_completo.py y
+# 02_process_policia.py en serie (SCRIPT_DEPENDENCIES), no a la vez
+MAX_WORKERS = os.cpu_count() or 1
 SILVER_POLICE_FILENAME = "policia_santander.parquet"
 
 DEPARTMENT_CODE = "68"
 DEPARTMENT_NAME = "SANTANDER"
 
 
+# =========================================================
+# Columnas de los archivos de Policía
+# =========================================================
+
+# Columnas equivalentes (según el año/archivo) que se combinan en una sola,
+# en orden de prioridad
+COLUMN_GROUPS: dict[str, List[str]] = {
+    "edad_persona": [
+        "*AGRUPA EDAD PERSONA",
+        "*AGRUPA EDAD PERSONA*",
+        "*AGRUPA_EDAD_PERSONA",
+        "AGRUPA EDAD PERSONA",
+        "AGRUPA_EDAD_PERSONA",
+        "GRUPO ETARIO",
+    ],
+    "armas_medios": [
+        "ARMA MEDIO",
+        "ARMAS MEDIO",
+        "ARMAS MEDIOS",
+        "ARMAS_MEDIOS",
+    ],
+    "codigo_dane": [
+        "CODIGO DANE",
+        "CODIGO_DANE",
+    ],
+    "departamento": [
+        "DEPARTAMENTO",
+        "Departamento",
+    ],
+    "fecha": [
+        "FECHA",
+        "FECHA  HECHO",
+        "FECHA HECHO",
+    ],
+    "municipio": [
+        "MUNICICPIO",
+        "MUNICIPIO",
+        "MUNICIPO",
+        "Municipio",
+    ],
+}
+
+# Columnas que se copian con otro nombre
+RENAMED_COLUMNS: dict[str, str] = {
+    "GENERO": "genero",
+    "CANTIDAD": "cantidad",
+}
+
+# Columnas finales que nos interesa conservar
+FINAL_COLUMNS: List[str] = [
+    "departamento",
+    "municipio",
+    "codigo_dane",
+    "edad_persona",
+    "armas_medios",
+    "cantidad",
+    "fecha",
+    "genero",
+    "anio",
+    "delito_archivo",
+    "archivo_origen",
+]
+
+# Todo lo que lee build_clean_dataframe; el resto de columnas de un archivo
+# se descarta al cargarlo
+USED_COLUMNS: set[str] = {
+    *(col for cols in COLUMN_GROUPS.values() for col in cols),
+    *RENAMED_COLUMNS,
+    *FINAL_COLUMNS,
+}
+
+# Valores de edad_persona que equivalen a "no reportado" (ya en mayúsculas)
+NO_REPORT_AGE_VALUES: List[str] = [
+    "",
+    "-",
+    "NO REPORTA",
+    "NO REPORTADO",
+    "NO RESPORTADO",
+]
+
+# Correcciones a delito_archivo (token del nombre de archivo -> delito)
+FILE_CRIME_REPLACEMENTS: dict[str, str] = {
+    "Delitos%20sexuales": "Delitos sexuales",
+    "Extorsi%C3%B3n": "Extorsion",
+    "Homicidio%20Intencional": "Homicidios",
+    "Delitos": "Delitos sexuales",
+    "Violencia%20intrafamiliar": "Violencia intrafamiliar",
+    "Violencia": "Violencia intrafamiliar",
+    "Lesiones%20personales": "Lesiones",
+    "Lesiones": "Lesiones",
+    "Lesiones%20en%20accidente%20de%20tr%C3%A1nsito": "Lesiones",
+    "Hurto%20pirater%C3%ADa%20terrestre": "Hurtos",
+    "Hurto%20automotores": "Hurtos",
+    "Hurto%20a%20residencias": "Hurtos",
+    "Hurto%20a%20personas": "Hurtos",
+    "Hurto%20a%20motocicletas": "Hurtos",
+    "Hurto%20a%20entidades%20Financieras": "Hurtos",
+    "Hurto%20a%20comercio": "Hurtos",
+    "Hurto%20a%20cabezas%20de%20ganado": "Abigeato",
+    "Hurto": "Hurtos",
+    "Homicidios%20en%20accidente%20de%20tr%C3%A1nsito": "Homicidios",
+}
+
+
 # =========================================================
 # Utilidades generales
 # =========================================================
@@ -75,6 +194,51 @@ def normalize_cod_muni(value) -> str:
     return code.zfill(5)
 
 
+
+def normalize_cod_muni_series(values: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de normalize_cod_muni para una columna completa:
+    mismas reglas, aplicadas con operaciones .str en lugar de una llamada
+    de Python por fila.
+    """
+    codes = (
+        values.astype(str)
+        .str.strip()
+        .str.split(".", n=1)
+        .str[0]
+        .str[:5]
+        .str.zfill(5)
+    )
+    return codes.where(values.notna(), "00000")
+
+
+def normalize_dane_codes(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Retorna (codigo_dane como texto sin espacios, codigo_municipio de 5
+    dígitos) para la columna codigo_dane.
+
+    Tras el astype(str) el texto se factoriza y strip + normalización se
+    hacen una vez por código distinto: hay unos cientos de códigos DANE
+    frente a millones de registros. (Se factoriza el texto y no el valor
+    original porque 68001 y 68001.0 son el mismo valor pero distinto texto.)
+    """
+    codes, uniques = pd.factorize(values.astype(str))
+    unique_codes = pd.Series(uniques, dtype=object).str.strip()
+    muni_codes = normalize_cod_muni_series(unique_codes)
+
+    codigo_dane = pd.Series(unique_codes.to_numpy()[codes], index=values.index, name=values.name)
+    codigo_municipio = pd.Series(muni_codes.to_numpy()[codes], index=values.index)
+    return codigo_dane, codigo_municipio
+
+
+def has_reported_age(values: pd.Series) -> pd.Series:
+    """
+    Máscara de registros con edad_persona reportada: no nula y distinta de
+    NO_REPORT_AGE_VALUES una vez normalizada con strip_upper.
+    """
+    return values.notna() & ~strip_upper(values).isin(NO_REPORT_AGE_VALUES)
+
+
 def normalize_date(df: pd.DataFrame, date_col: str) -> pd.Series:
     """
     Normaliza fechas manejando múltiples formatos.
@@ -106,16 +270,10 @@ def detect_header_row(
     if min_idx > max_idx:
         return 0
 
-    best_row = min_idx
-    best_count = -1
-
-    for i in range(min_idx, max_idx + 1):
-        count_not_null = df.iloc[i].notna().sum()
-        if count_not_null > best_count:
-            best_count = count_not_null
-            best_row = i
-
-    return best_row
+    # No nulos por fila candidata en una sola reducción; argmax toma la
+    # primera fila en caso de empate
+    counts = df.iloc[min_idx : max_idx + 1].notna().sum(axis=1).to_numpy()
+    return min_idx + int(counts.argmax())
 
 
 def load_police_file(path: Path) -> pd.DataFrame:
@@ -129,7 +287,7 @@ def load_police_file(path: Path) -> pd.DataFrame:
     print(f"\n➤ Procesando archivo: {path.name}")
 
     # 1) Leer todo el archivo una sola vez (optimización)
-    raw = pd.read_excel(path, header=None)
+    raw = pd.read_excel(path, header=None, engine="calamine")
 
     # 2) Detectar la fila de encabezado en el DataFrame completo
     header_row = detect_header_row(raw, min_idx=9, max_idx=12)
@@ -137,7 +295,7 @@ def load_police_file(path: Path) -> pd.DataFrame:
 
     # 3) Separar encabezados y datos
     header = raw.iloc[header_row]
-    df_file = raw.iloc[header_row + 1 :].copy()
+    df_file = raw.iloc[header_row + 1 :]
 
     # 4) Asignar encabezados
     df_file.columns = header
@@ -173,13 +331,30 @@ def load_police_file(path: Path) -> pd.DataFrame:
     df_file["delito_archivo"] = file_crime
     df_file["archivo_origen"] = path.name
 
-    return df_file
+    # 9) Conservar solo las columnas que usa build_clean_dataframe: el
+    #    DataFrame unificado no acumula las demás columnas de cada archivo
+    return df_file.loc[:, df_file.columns.isin(USED_COLUMNS)]
+
+
+def try_load_police_file(path: Path) -> tuple[pd.DataFrame | None, str | None]:
+    """
+    Envuelve load_police_file para el pool de procesos: retorna
+    (DataFrame, None) o (None, mensaje de error), así un archivo dañado
+    no interrumpe la lectura de los demás.
+    """
+    try:
+        return load_police_file(path), None
+    except Exception as exc:  # noqa: BLE001
+        return None, str(exc)
 
 
 def unify_police_files(bronze_dir: Path) -> pd.DataFrame:
     """
     Une todos los archivos .xls y .xlsx de la carpeta de policía scraping
     en un único DataFrame.
+
+    Los archivos se leen en paralelo en MAX_WORKERS procesos; el orden de
+    concatenación sigue siendo el de la lista ordenada de archivos.
     """
     check_exists(bronze_dir, label="Carpeta Bronze Policía")
 
@@ -190,12 +365,12 @@ def unify_police_files(bronze_dir: Path) -> pd.DataFrame:
     print(f"\nEncontrados {len(files)} archivos de policía (xls + xlsx).")
 
     dataframes: list[pd.DataFrame] = []
-    for path in files:
-        try:
-            df_file = load_police_file(path)
-            dataframes.append(df_file)
-        except Exception as exc:  # noqa: BLE001
-            print(f"⚠️ Error procesando {path.name}: {exc}")
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for path, (df_file, error) in zip(files, pool.map(try_load_police_file, files)):
+            if error is not None:
+                print(f"⚠️ Error procesando {path.name}: {error}")
+            else:
+                dataframes.append(df_file)
 
     if not dataframes:
         print("❌ No se logró cargar ningún archivo de policía.")
@@ -220,12 +395,25 @@ def combine_columns(
     """
     Combina varias columnas similares en una sola, tomando el primer valor no nulo.
     Solo usa las columnas que existan en el DataFrame.
+
+    Se recorren las columnas en orden rellenando solo los nulos que quedan
+    (una pasada por columna, sin el bloque intermedio filas x columnas de
+    bfill(axis=1)); se corta en cuanto no quedan nulos.
     """
     existing_cols = [col for col in source_columns if col in df.columns]
     if not existing_cols:
         return df
 
-    df[target_name] = df[existing_cols].bfill(axis=1).iloc[:, 0]
+    combined = df[existing_cols[0]]
+    for col in existing_cols[1:]:
+        missing = combined.isna()
+        if not missing.any():
+            break
+        combined = combined.where(~missing, df[col])
+
+    # Igual que bfill: las columnas object que quedan con un solo tipo
+    # (p. ej. solo números) se convierten a ese tipo
+    df[target_name] = combined.infer_objects()
     return df
 
 
@@ -234,100 +422,37 @@ def build_clean_dataframe(df_unified: pd.DataFrame) -> pd.DataFrame:
     A partir de df_unified, crea un DataFrame limpio con
     columnas homogéneas y nombres estandarizados.
     """
-    df = df_unified.copy()
-
-    # Definición de grupos de columnas equivalentes
-    age_cols = [
-        "*AGRUPA EDAD PERSONA",
-        "*AGRUPA EDAD PERSONA*",
-        "*AGRUPA_EDAD_PERSONA",
-        "AGRUPA EDAD PERSONA",
-        "AGRUPA_EDAD_PERSONA",
-        "GRUPO ETARIO",
-    ]
-
-    weapon_cols = [
-        "ARMA MEDIO",
-        "ARMAS MEDIO",
-        "ARMAS MEDIOS",
-        "ARMAS_MEDIOS",
-    ]
+    df = df_unified.copy(deep=False)
 
-    dane_code_cols = [
-        "CODIGO DANE",
-        "CODIGO_DANE",
-    ]
-
-    crime_cols = [
-        "DELITO",
-        "DELITOS",
-    ]
-
-    department_cols = [
-        "DEPARTAMENTO",
-        "Departamento",
-    ]
-
-    date_cols = [
-        "FECHA",
-        "FECHA  HECHO",
-        "FECHA HECHO",
-    ]
-
-    city_cols = [
-        "MUNICICPIO",
-        "MUNICIPIO",
-        "MUNICIPO",
-        "Municipio",
-    ]
+    # Descartar primero los registros sin edad reportada o sin género: la
+    # limpieza los elimina de todos modos, así las demás columnas se
+    # combinan y normalizan solo sobre las filas que llegan a la salida
+    df = combine_columns(df, COLUMN_GROUPS["edad_persona"], "edad_persona")
+    keep = pd.Series(True, index=df.index)
+    if "edad_persona" in df.columns:
+        keep &= has_reported_age(df["edad_persona"])
+    gender_col = "GENERO" if "GENERO" in df.columns else "genero"
+    if gender_col in df.columns:
+        keep &= df[gender_col].notna()
+    df = df[keep]
 
-    description_col = "DESCRIPCION CONDUCTA"
-    gender_col = "GENERO"
-    quantity_col = "CANTIDAD"
+    # Combinar columnas equivalentes en nuevas columnas limpias
+    for target_name, source_columns in COLUMN_GROUPS.items():
+        if target_name != "edad_persona":
+            df = combine_columns(df, source_columns, target_name)
 
-    # Combinar columnas en nuevas columnas limpias
-    df = combine_columns(df, age_cols, "edad_persona")
-    df = combine_columns(df, weapon_cols, "armas_medios")
-    df = combine_columns(df, dane_code_cols, "codigo_dane")
-    df = combine_columns(df, crime_cols, "delito")
-    df = combine_columns(df, department_cols, "departamento")
-    df = combine_columns(df, date_cols, "fecha")
-    df = combine_columns(df, city_cols, "municipio")
+    for source_col, target_name in RENAMED_COLUMNS.items():
+        if source_col in df.columns:
+            df[target_name] = df[source_col]
 
-    if description_col in df.columns:
-        df["descripcion_conducta"] = df[description_col]
+    existing_final_columns = [col for col in FINAL_COLUMNS if col in df.columns]
+    df_clean = df[existing_final_columns]
 
-    if gender_col in df.columns:
-        df["genero"] = df[gender_col]
-
-    if quantity_col in df.columns:
-        df["cantidad"] = df[quantity_col]
-
-    # Columnas finales que nos interesa conservar
-    final_columns = [
-        "departamento",
-        "municipio",
-        "codigo_dane",
-        "delito",
-        "edad_persona",
-        "armas_medios",
-        "cantidad",
-        "descripcion_conducta",
-        "fecha",
-        "genero",
-        "anio",
-        "delito_archivo",
-        "archivo_origen",
-    ]
-
-    existing_final_columns = [col for col in final_columns if col in df.columns]
-    df_clean = df[existing_final_columns].copy()
-
-    # Normalizar departamento a mayúsculas
-    if "departamento" in df_clean.columns:
-        df_clean["departamento"] = (
-            df_clean["departamento"].astype(str).str.strip().str.upper()
-        )
+    # Normalizar departamento y municipio a mayúsculas (una sola vez; la
+    # limpieza posterior ya los recibe normalizados)
+    for col in ("departamento", "municipio"):
+        if col in df_clean.columns:
+            df_clean[col] = strip_upper(df_clean[col])
 
     return df_clean
 
@@ -337,89 +462,35 @@ def clean_and_filter_santander(df_clean: pd.DataFrame) -> pd.DataFrame:
     Aplica todas las transformaciones de limpieza sobre df_clean y
     devuelve df_policia_santander listo para exportar.
     """
-    df = df_clean.copy()
+    df = df_clean.copy(deep=False)
 
     # Filtrar solo SANTANDER
-    df = df[df["departamento"] == DEPARTMENT_NAME].copy()
-
-    # Correcciones a delito_archivo
-    replacements_file_crime = {
-        "Delitos%20sexuales": "Delitos sexuales",
-        "Extorsi%C3%B3n": "Extorsion",
-        "Homicidio%20Intencional": "Homicidios",
-        "Delitos": "Delitos sexuales",
-        "Violencia%20intrafamiliar": "Violencia intrafamiliar",
-        "Violencia": "Violencia intrafamiliar",
-        "Lesiones%20personales": "Lesiones",
-        "Lesiones": "Lesiones",
-        "Lesiones%20en%20accidente%20de%20tr%C3%A1nsito": "Lesiones",
-        "Hurto%20pirater%C3%ADa%20terrestre": "Hurtos",
-        "Hurto%20automotores": "Hurtos",
-        "Hurto%20a%20residencias": "Hurtos",
-        "Hurto%20a%20personas": "Hurtos",
-        "Hurto%20a%20motocicletas": "Hurtos",
-        "Hurto%20a%20entidades%20Financieras": "Hurtos",
-        "Hurto%20a%20comercio": "Hurtos",
-        "Hurto%20a%20cabezas%20de%20ganado": "Abigeato",
-        "Hurto": "Hurtos",
-        "Homicidios%20en%20accidente%20de%20tr%C3%A1nsito": "Homicidios",
-    }
+    df = df[df["departamento"] == DEPARTMENT_NAME]
 
     if "delito_archivo" in df.columns:
-        df["delito_archivo"] = df["delito_archivo"].replace(replacements_file_crime)
+        # map busca cada valor en el diccionario en una sola pasada; los
+        # valores sin corrección conservan el original
+        corrected = df["delito_archivo"].map(FILE_CRIME_REPLACEMENTS)
+        df["delito_archivo"] = corrected.where(corrected.notna(), df["delito_archivo"])
 
-    # Limpiar municipio y delito (si existen)
-    if "municipio" in df.columns:
-        df["municipio"] = (
-            df["municipio"].astype(str).str.strip().str.upper()
-        )
-
-    if "delito" in df.columns:
-        df["delito"] = (
-            df["delito"].astype(str).str.strip().str.upper()
-        )
+    # Los registros a descartar se acumulan en una sola máscara y se filtran
+    # una vez al final
+    keep = pd.Series(True, index=df.index)
 
     # Limpiar edad_persona
     if "edad_persona" in df.columns:
-        df["edad_persona"] = df["edad_persona"].where(df["edad_persona"].notna())
-        mask_notna = df["edad_persona"].notna()
-        df.loc[mask_notna, "edad_persona"] = (
-            df.loc[mask_notna, "edad_persona"]
-            .astype(str)
-            .str.strip()
-            .str.upper()
-        )
-
-        no_report_age_values = [
-            "",
-            "-",
-            "NO REPORTA",
-            "NO REPORTADO",
-            "NO RESPORTADO",
-        ]
-
-        df["edad_persona"] = df["edad_persona"].replace(
-            no_report_age_values,
-            "NO REPORTADO",
-        )
-        df["edad_persona"] = df["edad_persona"].fillna("NO REPORTADO")
+        # Descartar registros con edad_persona = NO REPORTADO
+        keep &= has_reported_age(df["edad_persona"])
+        df["edad_persona"] = strip_upper(df["edad_persona"])
 
-        # Eliminar registros con edad_persona = NO REPORTADO
-        df = df[df["edad_persona"] != "NO REPORTADO"].copy()
-
-    # Eliminar registros con genero nulo
+    # Descartar registros con genero nulo
     if "genero" in df.columns:
-        df = df[df["genero"].notna()].copy()
+        keep &= df["genero"].notna()
 
     # Limpiar armas_medios
     if "armas_medios" in df.columns:
-        df["armas_medios"] = df["armas_medios"].where(df["armas_medios"].notna())
-        mask_notna_weapon = df["armas_medios"].notna()
-        df.loc[mask_notna_weapon, "armas_medios"] = (
-            df.loc[mask_notna_weapon, "armas_medios"]
-            .astype(str)
-            .str.strip()
-            .str.upper()
+        df["armas_medios"] = strip_upper(df["armas_medios"]).where(
+            df["armas_medios"].notna()
         )
 
         no_report_weapon_values = [
@@ -435,30 +506,20 @@ def clean_and_filter_santander(df_clean: pd.DataFrame) -> pd.DataFrame:
         )
         df["armas_medios"] = df["armas_medios"].fillna("NO REPORTADO")
 
-    # Si existe descripcion_conducta, ya no se usa; se elimina
-    if "descripcion_conducta" in df.columns:
-        df = df.drop(columns=["descripcion_conducta"])
-
-    # Eliminar columna delito si existe (la vamos a redefinir desde delito_archivo)
-    if "delito" in df.columns:
-        df = df.drop(columns=["delito"])
-
     # Renombrar delito_archivo -> delito y poner en mayúsculas
     if "delito_archivo" in df.columns:
         df = df.rename(columns={"delito_archivo": "delito"})
-        df["delito"] = (
-            df["delito"].astype(str).str.strip().str.upper()
-        )
+        df["delito"] = strip_upper(df["delito"])
 
     # Eliminar archivo_origen si existe
     if "archivo_origen" in df.columns:
         df = df.drop(columns=["archivo_origen"])
 
-    # Eliminar registros donde delito sea PIRATERIA o SECUESTRO
+    # Descartar registros donde delito sea PIRATERIA o SECUESTRO
     if "delito" in df.columns:
-        df = df[~df["delito"].isin(["PIRATERIA", "SECUESTRO"])].copy()
+        keep &= ~df["delito"].isin(["PIRATERIA", "SECUESTRO"])
 
-    return df
+    return df[keep]
 
 
 def prepare_for_export(df_police_santander: pd.DataFrame) -> pd.DataFrame:
@@ -469,7 +530,7 @@ def prepare_for_export(df_police_santander: pd.DataFrame) -> pd.DataFrame:
         - agrega codigo_departamento = "68"
         - agrega codigo_municipio normalizado desde codigo_dane
     """
-    df = df_police_santander.copy()
+    df = df_police_santander.copy(deep=False)
 
     # Normalizar fecha
     if "fecha" in df.columns:
@@ -477,8 +538,7 @@ def prepare_for_export(df_police_santander: pd.DataFrame) -> pd.DataFrame:
 
     # Normalizar códigos DANE / municipio / departamento
     if "codigo_dane" in df.columns:
-        df["codigo_dane"] = df["codigo_dane"].astype(str).str.strip()
-        df["codigo_municipio"] = df["codigo_dane"].apply(normalize_cod_muni)
+        df["codigo_dane"], df["codigo_municipio"] = normalize_dane_codes(df["codigo_dane"])
     else:
         df["codigo_municipio"] = "00000"
 
@@ -501,8 +561,9 @@ def export_to_parquet(
 
     df_police_santander.to_parquet(
         output_path,
-        engine="fastparquet",
+        engine="pyarrow",
         index=False,
+        **PARQUET_OPTIONS,
     )
 
     print(f"\n✅ Archivo guardado en: {output_path}")
@@ -21,16 +21,36 @@ Esquema Silver (columnas normalizadas):
     - cantidad: int
 """
 
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:  # Parser JSON en Rust; sin él se usa el módulo json estándar
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from _columns import map_distinct
+from _parquet import PARQUET_OPTIONS
 
 # === CONFIGURACIÓN ===
 BASE_DIR = Path(__file__).resolve().parent.parent
 BRONZE_DIR = BASE_DIR / "data" / "bronze" / "socrata_api"
 SILVER_DIR = BASE_DIR / "data" / "silver" / "delitos"
 
+# Procesos para transformar los JSON en paralelo (el parseo es CPU-bound)
+MAX_WORKERS = os.cpu_count() or 1
+
+# Decodificación del arreglo JSON Bronze (bytes -> lista de registros)
+load_records = orjson.loads if orjson is not None else json.loads
+
 # Mapeo de nombre de archivo a tipo de delito
 DELITO_MAP = {
     "homicidios": "HOMICIDIOS",
@@ -54,6 +74,19 @@ SILVER_COLUMNS = [
     "cantidad",
 ]
 
+# Tipos Arrow de cada columna: todas las tablas por archivo comparten este
+# esquema y se concatenan sin conversiones
+SILVER_SCHEMA = pa.schema([
+    ("tipo_delito", pa.string()),
+    ("fecha_hecho", pa.timestamp("ns")),
+    ("cod_muni", pa.string()),
+    ("municipio", pa.string()),
+    ("departamento", pa.string()),
+    ("genero", pa.string()),
+    ("arma_medio", pa.string()),
+    ("cantidad", pa.int64()),
+])
+
 
 def normalize_cod_muni(value) -> str:
     """
@@ -82,6 +115,24 @@ def normalize_cod_muni(value) -> str:
     return code.zfill(5)
 
 
+
+def normalize_cod_muni_series(values: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de normalize_cod_muni para una columna completa:
+    mismas reglas, aplicadas con operaciones .str en lugar de una llamada
+    de Python por fila.
+    """
+    codes = (
+        values.astype(str)
+        .str.strip()
+        .str.split(".", n=1)
+        .str[0]
+        .str[:5]
+        .str.zfill(5)
+    )
+    return codes.where(values.notna(), "00000")
+
+
 def normalize_date(df: pd.DataFrame, date_col: str) -> pd.Series:
     """
     Normaliza fechas manejando múltiples formatos.
@@ -90,8 +141,27 @@ def normalize_date(df: pd.DataFrame, date_col: str) -> pd.Series:
         - DD/MM/YYYY (ej: 10/10/2012)
         - YYYY-MM-DDTHH:MM:SS.sss (ej: 2003-01-03T00:00:00.000)
     """
-    # Intentar parsear con formato mixto
-    return pd.to_datetime(df[date_col], format="mixed", dayfirst=True, errors="coerce")
+    valores = df[date_col]
+    # Socrata entrega las fechas en ISO 8601: primero ese formato fijo
+    # (parser en C) y solo lo que no encaje pasa por el parseo mixto
+    fechas = pd.to_datetime(valores, format="ISO8601", errors="coerce")
+    pendientes = fechas.isna() & valores.notna()
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(
+            valores[pendientes], format="mixed", dayfirst=True, errors="coerce"
+        )
+    return fechas
+
+
+def upper_or_default(values: pd.Series, default: str = "NO REPORTADO") -> pd.Series:
+    """
+    Equivale a values.fillna(default).astype(str).str.upper(), con la
+    conversión aplicada una vez por valor distinto (map_distinct).
+    """
+    return map_distinct(
+        values,
+        lambda value: default.upper() if value is None else str(value).upper(),
+    )
 
 
 def get_column_value(df: pd.DataFrame, possible_names: List[str], default: str = "NO REPORTADO") -> pd.Series:
@@ -101,14 +171,15 @@ def get_column_value(df: pd.DataFrame, possible_names: List[str], default: str =
     """
     for name in possible_names:
         if name in df.columns:
-            return df[name].fillna(default).astype(str).str.upper()
+            return upper_or_default(df[name], default)
     
     return pd.Series([default] * len(df), index=df.index)
 
 
-def process_file(filepath: Path) -> pd.DataFrame:
+def process_file(filepath: Path) -> pa.Table:
     """
-    Procesa un archivo JSON Bronze y lo transforma al esquema Silver.
+    Procesa un archivo JSON Bronze y lo transforma al esquema Silver
+    (tabla Arrow con SILVER_SCHEMA).
     """
     # Obtener nombre del delito desde el nombre del archivo
     file_stem = filepath.stem
@@ -116,30 +187,32 @@ def process_file(filepath: Path) -> pd.DataFrame:
     
     print(f"  Procesando: {filepath.name} -> {tipo_delito}")
     
-    # Leer JSON
-    df = pd.read_json(filepath)
+    # Leer JSON: el arreglo de registros se decodifica en una sola llamada y
+    # las columnas quedan como texto (sin la inferencia de tipos de
+    # pd.read_json); fechas, códigos y cantidades se convierten más abajo
+    df = pd.DataFrame(load_records(filepath.read_bytes()))
     
     if df.empty:
         print(f"    ⚠ Archivo vacío")
-        return pd.DataFrame(columns=SILVER_COLUMNS)
+        return SILVER_SCHEMA.empty_table()
     
     print(f"    Registros raw: {len(df):,}")
     
     # === TRANSFORMACIONES ===
     
-    # Crear DataFrame Silver con el número correcto de filas
-    n_rows = len(df)
+    # Las columnas Silver se reúnen en un dict y el DataFrame se crea una
+    # sola vez al final (los valores escalares se repiten en todas las filas)
+    columns: dict[str, pd.Series | str | int] = {}
     
     # 1. tipo_delito (nuevo, basado en nombre de archivo)
-    df_silver = pd.DataFrame()
-    df_silver["tipo_delito"] = [tipo_delito] * n_rows
+    columns["tipo_delito"] = tipo_delito
     
     # 2. fecha_hecho (normalizar formatos)
     date_col = "fecha_hecho" if "fecha_hecho" in df.columns else None
     if date_col:
-        df_silver["fecha_hecho"] = normalize_date(df, date_col)
+        columns["fecha_hecho"] = normalize_date(df, date_col)
     else:
-        df_silver["fecha_hecho"] = pd.NaT
+        columns["fecha_hecho"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
     
     # 3. cod_muni (normalizar a 5 dígitos)
     cod_col = None
@@ -149,37 +222,49 @@ def process_file(filepath: Path) -> pd.DataFrame:
             break
     
     if cod_col:
-        df_silver["cod_muni"] = df[cod_col].apply(normalize_cod_muni)
+        columns["cod_muni"] = normalize_cod_muni_series(df[cod_col])
     else:
-        df_silver["cod_muni"] = "00000"
+        columns["cod_muni"] = "00000"
     
     # 4. municipio (mayúsculas)
     if "municipio" in df.columns:
-        df_silver["municipio"] = df["municipio"].fillna("NO REPORTADO").astype(str).str.upper()
+        columns["municipio"] = upper_or_default(df["municipio"])
     else:
-        df_silver["municipio"] = "NO REPORTADO"
+        columns["municipio"] = "NO REPORTADO"
     
     # 5. departamento (siempre SANTANDER)
-    df_silver["departamento"] = "SANTANDER"
+    columns["departamento"] = "SANTANDER"
     
     # 6. genero (unificar columnas genero/sexo)
-    df_silver["genero"] = get_column_value(df, ["genero", "sexo"], "NO REPORTADO")
+    columns["genero"] = get_column_value(df, ["genero", "sexo"], "NO REPORTADO")
     
     # 7. arma_medio (unificar columna armas_medios)
-    df_silver["arma_medio"] = get_column_value(df, ["armas_medios", "arma_medio"], "NO REPORTADO")
+    columns["arma_medio"] = get_column_value(df, ["armas_medios", "arma_medio"], "NO REPORTADO")
     
     # 8. cantidad (entero)
     if "cantidad" in df.columns:
-        df_silver["cantidad"] = pd.to_numeric(df["cantidad"], errors="coerce").fillna(1).astype(int)
+        columns["cantidad"] = pd.to_numeric(df["cantidad"], errors="coerce").fillna(1).astype(int)
     else:
-        df_silver["cantidad"] = 1
+        columns["cantidad"] = 1
     
-    # Asegurar orden de columnas
-    df_silver = df_silver[SILVER_COLUMNS]
+    df_silver = pd.DataFrame(columns, index=df.index, columns=SILVER_COLUMNS)
     
     print(f"    Registros Silver: {len(df_silver):,}")
     
-    return df_silver
+    # El esquema fija el orden de columnas y sus tipos
+    return pa.Table.from_pandas(df_silver, schema=SILVER_SCHEMA, preserve_index=False)
+
+
+def try_process_file(filepath: Path) -> tuple[pa.Table | None, str | None]:
+    """
+    Envuelve process_file para el pool de procesos: retorna (tabla, None)
+    o (None, mensaje de error), así un archivo dañado no interrumpe el
+    procesamiento de los demás.
+    """
+    try:
+        return process_file(filepath), None
+    except Exception as exc:  # noqa: BLE001
+        return None, str(exc)
 
 
 def main() -> None:
@@ -191,54 +276,52 @@ def main() -> None:
     # Crear directorio de salida
     SILVER_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Procesar cada archivo JSON
-    dataframes = []
+    # Procesar los archivos JSON en paralelo (MAX_WORKERS procesos); las
+    # tablas se recogen en el orden de la lista ordenada de archivos
+    files = sorted(BRONZE_DIR.glob("*.json"))
+    tables: List[pa.Table] = []
     
-    for filepath in sorted(BRONZE_DIR.glob("*.json")):
-        try:
-            df = process_file(filepath)
-            if not df.empty:
-                dataframes.append(df)
-        except Exception as e:
-            print(f"  ✗ Error procesando {filepath.name}: {e}")
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for filepath, (table, error) in zip(files, pool.map(try_process_file, files)):
+            if error is not None:
+                print(f"  ✗ Error procesando {filepath.name}: {error}")
+            elif table.num_rows:
+                tables.append(table)
     
-    if not dataframes:
+    if not tables:
         print("\n⚠ No se procesaron archivos")
         return
     
-    # Concatenar todos los DataFrames
+    # Concatenar las tablas: Arrow encadena los bloques de cada archivo sin
+    # copiarlos (pd.concat reconstruía todas las columnas)
     print("\n" + "-" * 60)
     print("📦 Consolidando datos...")
     
-    df_consolidated = pd.concat(dataframes, ignore_index=True)
+    consolidated = pa.concat_tables(tables)
     
-    print(f"  Total registros consolidados: {len(df_consolidated):,}")
+    print(f"  Total registros consolidados: {consolidated.num_rows:,}")
     
     # Estadísticas por tipo de delito
     print("\n📊 Registros por tipo de delito:")
-    for delito in sorted(df_consolidated["tipo_delito"].unique()):
-        count = len(df_consolidated[df_consolidated["tipo_delito"] == delito])
-        print(f"    {delito:30} {count:>10,}")
+    delito_counts = pc.value_counts(consolidated["tipo_delito"]).to_pylist()
+    for item in sorted(delito_counts, key=lambda item: item["values"]):
+        print(f"    {item['values']:30} {item['counts']:>10,}")
     
     # Estadísticas por año
-    df_consolidated["anio"] = df_consolidated["fecha_hecho"].dt.year
     print("\n📊 Registros por año:")
-    year_counts = df_consolidated.groupby("anio").size().sort_index()
-    for year, count in year_counts.items():
-        if pd.notna(year):
-            print(f"    {int(year):>6} {count:>10,}")
-    
-    # Eliminar columna temporal de año
-    df_consolidated = df_consolidated.drop(columns=["anio"])
+    year_counts = pc.value_counts(pc.year(consolidated["fecha_hecho"])).to_pylist()
+    for item in sorted(year_counts, key=lambda item: item["values"] or 0):
+        if item["values"] is not None:
+            print(f"    {item['values']:>6} {item['counts']:>10,}")
     
     # Guardar en Parquet
     output_path = SILVER_DIR / "consolidado_delitos.parquet"
-    df_consolidated.to_parquet(output_path, index=False)
+    pq.write_table(consolidated, output_path, **PARQUET_OPTIONS)
     
     print("\n" + "=" * 60)
     print(f"✅ Guardado en: {output_path}")
-    print(f"   Registros: {len(df_consolidated):,}")
-    print(f"   Columnas: {df_consolidated.columns.tolist()}")
+    print(f"   Registros: {consolidated.num_rows:,}")
+    print(f"   Columnas: {consolidated.column_names}")
     print("=" * 60)
 
 
@@ -34,8 +34,11 @@ import re
 from pathlib import Path
 from typing import List
 
+import numpy as np
 import pandas as pd
 
+from _columns import map_distinct
+
 # === CONFIGURACIÓN ===
 # Subimos un nivel desde scripts/ para llegar a la raíz del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,6 +57,46 @@ DELITOS_INF_STEM = "delitos_informaticos"
 BUCARAMANGA_OUTPUT = "delitos_bucaramanga.parquet"
 DELITOS_INF_OUTPUT = "delitos_informaticos.parquet"
 
+# to_snake_case: separadores que pasan a "_" y rachas de "_" a colapsar
+SNAKE_CASE_SEPARATORS = str.maketrans({" ": "_", "-": "_", "/": "_", ".": "_"})
+REPEATED_UNDERSCORES = re.compile(r"_{2,}")
+
+# descripcion_conducta: 'ARTICULO 123. DESCRIPCION...'
+ARTICULO_PATTERN = re.compile(r"(ARTICULO\s+\d+)")
+CONDUCTA_PATTERN = re.compile(r"(?i)ARTICULO\s+\d+\.\s*(.*)")
+
+# mes: número al inicio ('01. ENERO') o nombre del mes ('ENERO')
+LEADING_NUMBER_PATTERN = re.compile(r"(\d+)")
+# dia_semana: 'numero - texto' ('05. VIERNES')
+DAY_OF_WEEK_PATTERN = re.compile(r"(\d+)\D+(.*)")
+
+# curso_de_vida por edad en años cumplidos: intervalos (a, b] sobre la edad
+# truncada, es decir 0-6, 7-11, 12-18, 19-28, 29-59 y 60 o más
+CURSO_VIDA_BINS: List[float] = [-1, 6, 11, 18, 28, 59, np.inf]
+CURSO_VIDA_LABELS: List[str] = [
+    "01. PRIMERA INFANCIA",
+    "02. INFANCIA",
+    "03. ADOLESCENCIA",
+    "04. JOVENES",
+    "05. ADULTEZ",
+    "06. PERSONA MAYOR",
+]
+MONTH_MAP: dict[str, int] = {
+    "ENERO": 1,
+    "FEBRERO": 2,
+    "MARZO": 3,
+    "ABRIL": 4,
+    "MAYO": 5,
+    "JUNIO": 6,
+    "JULIO": 7,
+    "AGOSTO": 8,
+    "SEPTIEMBRE": 9,
+    "SETIEMBRE": 9,
+    "OCTUBRE": 10,
+    "NOVIEMBRE": 11,
+    "DICIEMBRE": 12,
+}
+
 
 # =========================================================
 # Utilidades generales
@@ -86,12 +129,8 @@ def to_snake_case(name: str) -> str:
 
     (No elimina tildes, solo formatea.)
     """
-    text = str(name).strip()
-    for sep in [" ", "-", "/", "."]:
-        text = text.replace(sep, "_")
-    while "__" in text:
-        text = text.replace("__", "_")
-    return text.lower()
+    text = str(name).strip().translate(SNAKE_CASE_SEPARATORS)
+    return REPEATED_UNDERSCORES.sub("_", text).lower()
 
 
 def normalize_date(df: pd.DataFrame, date_col: str) -> pd.Series:
@@ -102,7 +141,16 @@ def normalize_date(df: pd.DataFrame, date_col: str) -> pd.Series:
         - DD/MM/YYYY (ej: 10/10/2012)
         - YYYY-MM-DDTHH:MM:SS.sss (ej: 2003-01-03T00:00:00.000)
     """
-    return pd.to_datetime(df[date_col], format="mixed", dayfirst=True, errors="coerce")
+    valores = df[date_col]
+    # Socrata entrega las fechas en ISO 8601: primero ese formato fijo
+    # (parser en C) y solo lo que no encaje pasa por el parseo mixto
+    fechas = pd.to_datetime(valores, format="ISO8601", errors="coerce")
+    pendientes = fechas.isna() & valores.notna()
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(
+            valores[pendientes], format="mixed", dayfirst=True, errors="coerce"
+        )
+    return fechas
 
 
 def clean_latlon(series: pd.Series, is_lat: bool) -> pd.Series:
@@ -112,12 +160,16 @@ def clean_latlon(series: pd.Series, is_lat: bool) -> pd.Series:
         - Sustituye comas por puntos
         - Valores fuera de rango se ponen como null
     """
-    s = (
-        series.astype(str)
-        .str.strip()
-        .replace({"": pd.NA, "nan": pd.NA, "NaN": pd.NA})
-    )
-    s = pd.to_numeric(s.str.replace(",", ".", regex=False), errors="coerce")
+    if series.dtype.kind == "f":
+        # pd.read_json ya infirió float: solo queda el control de rango
+        s = series
+    else:
+        s = (
+            series.astype(str)
+            .str.strip()
+            .replace({"": pd.NA, "nan": pd.NA, "NaN": pd.NA})
+        )
+        s = pd.to_numeric(s.str.replace(",", ".", regex=False), errors="coerce")
 
     if is_lat:
         mask_valid = (s >= -90) & (s <= 90)
@@ -137,7 +189,7 @@ def extract_articulo(text: str | float | int | None) -> str | None:
         return None
 
     t = text.strip().upper()
-    match = re.match(r"(ARTICULO\s+\d+)", t)
+    match = ARTICULO_PATTERN.match(t)
     if match:
         return match.group(1)
     return None
@@ -153,7 +205,7 @@ def extract_conducta(text: str | float | int | None) -> str | None:
 
     t = text.strip()
     # Buscar 'ARTICULO XX. ' y quedarse con lo que viene después
-    match = re.match(r"(?i)ARTICULO\s+\d+\.\s*(.*)", t)
+    match = CONDUCTA_PATTERN.match(t)
     if match:
         return match.group(1).strip()
     return t if t else None
@@ -231,7 +283,7 @@ def parse_month_label(value) -> int | None:
     s = str(value).strip().upper()
 
     # Intentar extraer números al inicio
-    match = re.match(r"(\d+)", s)
+    match = LEADING_NUMBER_PATTERN.match(s)
     if match:
         try:
             return int(match.group(1))
@@ -242,23 +294,7 @@ def parse_month_label(value) -> int | None:
     parts = s.split(".")
     name = parts[-1].strip()
 
-    month_map = {
-        "ENERO": 1,
-        "FEBRERO": 2,
-        "MARZO": 3,
-        "ABRIL": 4,
-        "MAYO": 5,
-        "JUNIO": 6,
-        "JULIO": 7,
-        "AGOSTO": 8,
-        "SEPTIEMBRE": 9,
-        "SETIEMBRE": 9,
-        "OCTUBRE": 10,
-        "NOVIEMBRE": 11,
-        "DICIEMBRE": 12,
-    }
-
-    return month_map.get(name)
+    return MONTH_MAP.get(name)
 
 
 def split_day_of_week(value) -> tuple[int | None, str | None]:
@@ -272,7 +308,7 @@ def split_day_of_week(value) -> tuple[int | None, str | None]:
     s = str(value).strip()
 
     # Buscar 'numero - texto'
-    match = re.match(r"(\d+)\D+(.*)", s)
+    match = DAY_OF_WEEK_PATTERN.match(s)
     if not match:
         return None, s.strip().upper() if s else None
 
@@ -307,20 +343,18 @@ def transform_bucaramanga_40(df: pd.DataFrame) -> pd.DataFrame:
 
     # 2) Mes en texto -> numérico
     if "mes" in df.columns:
-        df["mes"] = df["mes"].apply(parse_month_label).astype("Int64")
+        # Una llamada por etiqueta distinta (hay 12 meses) en vez de por fila
+        df["mes"] = map_distinct(df["mes"], parse_month_label).astype("Int64")
 
     # 3) dia_semana -> dia_nombre, dia_nombre_orden
     if "dia_semana" in df.columns:
-        dias_orden: list[int | None] = []
-        dias_nombre: list[str | None] = []
-
-        for val in df["dia_semana"]:
-            orden, nombre = split_day_of_week(val)
-            dias_orden.append(orden)
-            dias_nombre.append(nombre)
-
-        df["dia_nombre_orden"] = pd.Series(dias_orden, index=df.index).astype("Int64")
-        df["dia_nombre"] = dias_nombre
+        # Una llamada por día distinto (hay 7) en vez de por fila
+        df["dia_nombre_orden"] = map_distinct(
+            df["dia_semana"], lambda value: split_day_of_week(value)[0]
+        ).astype("Int64")
+        df["dia_nombre"] = map_distinct(
+            df["dia_semana"], lambda value: split_day_of_week(value)[1]
+        )
 
         df = df.drop(columns=["dia_semana"])
 
@@ -336,7 +370,7 @@ def transform_bucaramanga_40(df: pd.DataFrame) -> pd.DataFrame:
 
     # 6) Nueva columna articulo desde descripcion_conducta
     if "descripcion_conducta" in df.columns:
-        df["articulo"] = df["descripcion_conducta"].apply(extract_articulo)
+        df["articulo"] = map_distinct(df["descripcion_conducta"], extract_articulo)
 
     return df
 
@@ -376,48 +410,27 @@ def transform_bucaramanga_150(df: pd.DataFrame) -> pd.DataFrame:
 
     # 2) dia_nombre en mayúsculas
     if "dia_nombre" in df.columns:
-        df["dia_nombre"] = (
-            df["dia_nombre"]
-            .astype(str)
-            .str.strip()
-            .replace({"": pd.NA})
-            .str.upper()
-        )
+        dia_nombre = df["dia_nombre"].astype(str).str.strip().str.upper()
+        df["dia_nombre"] = dia_nombre.mask(dia_nombre == "", pd.NA)
 
     # 3) descripcion_conducta -> conducta + articulo
     if "descripcion_conducta" in df.columns:
-        df["conducta"] = df["descripcion_conducta"].apply(extract_conducta)
-        df["articulo"] = df["descripcion_conducta"].apply(extract_articulo)
+        df["conducta"] = map_distinct(df["descripcion_conducta"], extract_conducta)
+        df["articulo"] = map_distinct(df["descripcion_conducta"], extract_articulo)
 
     # 4) edad "NO DISPONIBLE" -> null
     if "edad" in df.columns:
-        df["edad"] = (
-            df["edad"]
-            .replace("NO DISPONIBLE", pd.NA)
-            .replace("", pd.NA)
-        )
+        df["edad"] = df["edad"].mask(df["edad"].isin(["NO DISPONIBLE", ""]), pd.NA)
         edad_num = pd.to_numeric(df["edad"], errors="coerce")
 
-        # 5) curso_de_vida desde edad
-        def map_curso_vida(age: float | int | None) -> str:
-            if pd.isna(age):
-                return "NO REPORTA"
-            age_int = int(age)
-            if 0 <= age_int <= 6:
-                return "01. PRIMERA INFANCIA"
-            if 7 <= age_int <= 11:
-                return "02. INFANCIA"
-            if 12 <= age_int <= 18:
-                return "03. ADOLESCENCIA"
-            if 19 <= age_int <= 28:
-                return "04. JOVENES"
-            if 29 <= age_int <= 59:
-                return "05. ADULTEZ"
-            if age_int >= 60:
-                return "06. PERSONA MAYOR"
-            return "NO REPORTA"
-
-        df["curso_de_vida"] = edad_num.apply(map_curso_vida)
+        # 5) curso_de_vida desde edad (pd.cut sobre la edad truncada; las
+        # edades nulas o negativas quedan fuera de los intervalos)
+        curso_vida = pd.cut(
+            np.trunc(edad_num),
+            bins=CURSO_VIDA_BINS,
+            labels=CURSO_VIDA_LABELS,
+        ).astype(object)
+        df["curso_de_vida"] = curso_vida.where(curso_vida.notna(), "NO REPORTA")
 
     # 6) Eliminar columnas curso_vida y curso_vida_orden si existen
     cols_to_drop = [c for c in ["curso_vida", "curso_vida_orden"] if c in df.columns]
@@ -437,15 +450,21 @@ def transform_bucaramanga_150(df: pd.DataFrame) -> pd.DataFrame:
             .replace({"": pd.NA, "NaT": pd.NA, "nan": pd.NA})
         )
 
+        # Se parsea y formatea una vez por hora distinta y se expande a las
+        # filas por código. factorize conserva el orden de aparición, así que
+        # el formato que to_datetime infiere del primer valor es el mismo
+        codes, uniques = pd.factorize(hora_raw.astype(str))
         dt = pd.to_datetime(
-            "1970-01-01 " + hora_raw.astype(str),
+            "1970-01-01 " + pd.Series(uniques, dtype=object),
             errors="coerce",
         )
 
         hora_out = dt.dt.strftime("%H:%M:%S")
         # Donde la conversión falló, dejamos como <NA>
         hora_out = hora_out.where(dt.notna(), pd.NA)
-        df["hora"] = hora_out.astype("string")
+        df["hora"] = pd.Series(
+            hora_out.to_numpy(dtype=object)[codes], index=df.index
+        ).astype("string")
 
     return df
 
@@ -516,9 +535,9 @@ def process_bucaramanga() -> None:
     if "articulo" in df_bucaramanga.columns and "descripcion_conducta" in df_bucaramanga.columns:
         mask_null_art = df_bucaramanga["articulo"].isna()
         if mask_null_art.any():
-            df_bucaramanga.loc[mask_null_art, "articulo"] = (
-                df_bucaramanga.loc[mask_null_art, "descripcion_conducta"]
-                .apply(extract_articulo)
+            df_bucaramanga.loc[mask_null_art, "articulo"] = map_distinct(
+                df_bucaramanga.loc[mask_null_art, "descripcion_conducta"],
+                extract_articulo,
             )
 
     # Eliminar duplicados
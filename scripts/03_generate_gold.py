@@ -42,6 +42,15 @@ def load_gold_base() -> tuple[gpd.GeoDataFrame, pd.DataFrame, pd.DataFrame, pd.D
     poblacion = pd.read_parquet(POBLACION_INPUT)
     divipola = pd.read_parquet(DIVIPOLA_INPUT)
     
+    # Columnas de texto repetitivas como category: los groupby / pivot usan
+    # los códigos enteros en lugar de hashear cadenas. codigo_municipio se
+    # deja Int64 porque es la llave de los merge con geografía y población
+    for col in ("delito", "genero", "origen"):
+        if col in policia.columns:
+            policia[col] = policia[col].astype("category")
+    for col in ("genero", "grupo_edad"):
+        poblacion[col] = poblacion[col].astype("category")
+    
     print(f"  Geografía:     {len(geo):>10,} registros")
     print(f"  Policía:       {len(policia):>10,} registros (ya incluye complementos de Socrata)")
     print(f"  Población:     {len(poblacion):>10,} registros")
@@ -87,13 +96,26 @@ def integrate_gold(
     # Agregar delitos (esto SI genera anio y mes)
     print("➤ Agregando delitos (municipio-año-mes)…")
 
+    # Una sola agrupación municipio-año-mes para el total y los conteos de
+    # días; estos últimos se unen al final para conservar el orden de columnas
     delitos_agg = (
         delitos.groupby(["codigo_municipio", "anio", "mes"])
-        .agg(total_delitos=("cantidad", "sum"))
+        .agg(
+            total_delitos=("cantidad", "sum"),
+            n_dias_semana=("es_dia_semana", "sum"),
+            n_fines_de_semana=("es_fin_de_semana", "sum"),
+            n_festivos=("es_festivo", "sum"),
+            n_dias_laborales=("es_dia_laboral", "sum"),
+        )
         .reset_index()
     )
+    dias_agg = delitos_agg.drop(columns=["total_delitos"])
 
-    df = df.merge(delitos_agg, on="codigo_municipio", how="left")
+    df = df.merge(
+        delitos_agg[["codigo_municipio", "anio", "mes", "total_delitos"]],
+        on="codigo_municipio",
+        how="left",
+    )
 
     # Pivot delitos por tipo
     print("➤ Pivot delitos por tipo…")
@@ -105,7 +127,7 @@ def integrate_gold(
             values="cantidad",
             aggfunc="sum",
             fill_value=0,
-            observed=False
+            observed=True
         )
         .reset_index()
     )
@@ -122,7 +144,7 @@ def integrate_gold(
             values="n_poblacion",
             aggfunc="sum",
             fill_value=0,
-            observed=False
+            observed=True
         )
         .reset_index()
     )
@@ -153,8 +175,15 @@ def integrate_gold(
     df["proporcion_adultos"] = df["poblacion_adultos"] / df["poblacion_total"]
     df["proporcion_adolescentes"] = df["poblacion_adolescentes"] / df["poblacion_total"]
 
+    # Fecha del primer día del mes directamente desde año/mes numéricos (sin
+    # armar y parsear cadenas "AAAA-MM-01"). Se pasan como float porque los
+    # municipios sin delitos tienen <NA> en Int64, que to_datetime no acepta
     df["fecha"] = pd.to_datetime(
-        df["anio"].astype(str) + "-" + df["mes"].astype(str) + "-01",
+        {
+            "year": df["anio"].astype("float64"),
+            "month": df["mes"].astype("float64"),
+            "day": 1,
+        },
         errors="coerce"
     )
     df["trimestre"] = df["fecha"].dt.quarter
@@ -164,17 +193,6 @@ def integrate_gold(
     # --- Conteos mensuales de días (agregados desde delitos) ---
     print("➤ Agregando conteos mensuales de días…")
 
-    dias_agg = (
-        delitos.groupby(["codigo_municipio", "anio", "mes"])
-        .agg(
-            n_dias_semana=("es_dia_semana", "sum"),
-            n_fines_de_semana=("es_fin_de_semana", "sum"),
-            n_festivos=("es_festivo", "sum"),
-            n_dias_laborales=("es_dia_laboral", "sum"),
-        )
-        .reset_index()
-    )
-
     df = df.merge(dias_agg, on=["codigo_municipio", "anio", "mes"], how="left")
 
     return df
@@ -104,8 +104,9 @@ def clean_policia(df: pd.DataFrame) -> pd.DataFrame:
 
     df["codigo_dane"] = df["codigo_dane"].astype(str).str.strip()
 
-    df["codigo_dane"] = df["codigo_dane"].apply(
-        lambda x: x[:-3] if isinstance(x, str) and len(x) > 3 else x
+    # Quitar los 3 últimos dígitos (centro poblado) de los códigos largos
+    df["codigo_dane"] = df["codigo_dane"].where(
+        df["codigo_dane"].str.len() <= 3, df["codigo_dane"].str[:-3]
     )
 
     df["codigo_dane"] = df["codigo_dane"].str.replace(r"\D+", "", regex=True)
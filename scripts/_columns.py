@@ -0,0 +1,46 @@
+"""
+_columns.py
+===========
+
+Transformaciones de columnas compartidas por los scripts del pipeline.
+
+Igual que _http.py, el prefijo "_" hace que run_pipeline.py no lo trate como
+un paso del pipeline; los scripts lo importan directamente
+(`from _columns import map_distinct`).
+
+Las columnas de texto de las fuentes (municipios, delitos, grupos de edad,
+géneros, ...) tienen pocos valores distintos y muchas filas: map_distinct
+aplica una función una vez por valor distinto (pd.factorize) y expande el
+resultado a las filas por código, en lugar de llamarla por fila.
+"""
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+def map_distinct(values: pd.Series, func: Callable[[object], object]) -> pd.Series:
+    """
+    Equivale a values.apply(func) para funciones por valor (sin estado):
+    func se evalúa una vez por valor distinto (pd.factorize) y el resultado
+    se expande a las filas por código. Los nulos reciben func(None).
+    """
+    codes, uniques = pd.factorize(values)
+    # El último elemento es el que toma el código -1 de los nulos
+    lookup = np.array([func(value) for value in uniques] + [func(None)], dtype=object)
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+
+def strip_upper(values: pd.Series) -> pd.Series:
+    """
+    Equivale a values.astype(str).str.strip().str.upper() con map_distinct.
+
+    factorize agrupa None/NaN/NaT en un solo código; esas filas se convierten
+    aparte para conservar su propio texto ("NONE", "NAN", ...).
+    """
+    result = map_distinct(values, lambda value: str(value).strip().upper())
+    nulls = values.isna()
+    if nulls.any():
+        result[nulls] = values[nulls].astype(str).str.upper()
+    return result
@@ -0,0 +1,162 @@
+"""
+_http.py
+========
+
+Utilidades HTTP compartidas por los scripts de extracción (Bronze).
+
+El prefijo "_" hace que run_pipeline.py no lo trate como un paso del
+pipeline; los scripts lo importan directamente (`from _http import ...`)
+porque se ejecutan con `scripts/` como primer elemento de sys.path.
+
+Sesiones:
+    build_session() crea una sesión con pool de conexiones y reintentos con
+    backoff exponencial ante errores de conexión y respuestas 429/5xx
+    (respetando Retry-After). Los certificados TLS se validan siempre contra
+    el bundle de CA de certifi. SESSION es la sesión por defecto del módulo.
+
+Descargas condicionales:
+    Junto a cada archivo descargado se guarda `<archivo>.meta.json` con el
+    ETag / Last-Modified de la respuesta. En la siguiente ejecución se envían
+    If-None-Match / If-Modified-Since y, si el servidor responde 304, se
+    conserva el archivo existente sin volver a descargarlo.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Reintentos ante fallos transitorios: 0.5s, 1s, 2s, 4s, 8s entre intentos.
+# raise_on_status=False: agotados los reintentos se devuelve la última
+# respuesta y el llamador la valida con raise_for_status como siempre.
+RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+def build_session(pool_size: int = 16) -> requests.Session:
+    """Sesión HTTP con pool de `pool_size` conexiones por host y RETRY."""
+    session = requests.Session()
+    session.verify = certifi.where()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=RETRY,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = build_session()
+
+
+def meta_path_for(dest: Path) -> Path:
+    """Ruta del archivo de metadatos HTTP asociado a `dest`."""
+    return dest.with_name(f"{dest.name}.meta.json")
+
+
+def conditional_get(
+    url: str,
+    dest: Path,
+    session: requests.Session | None = None,
+    **kwargs,
+) -> requests.Response | None:
+    """
+    GET condicional respecto a la última descarga guardada en `dest`.
+
+    Retorna None si el servidor responde 304 (el archivo local sigue
+    vigente); en otro caso la respuesta, ya validada con raise_for_status.
+    La petición usa `session` (SESSION si no se indica); `kwargs` se pasan
+    a session.get (timeout, stream, verify, ...).
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+
+    meta_path = meta_path_for(dest)
+    if dest.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = (session or SESSION).get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        response.close()
+        return None
+
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    # Mientras se reescribe `dest` no debe quedar un ETag que lo valide
+    meta_path.unlink(missing_ok=True)
+    return response
+
+
+# Tamaño de bloque al volcar respuestas a disco
+CHUNK_SIZE = 1024 * 1024
+
+
+def stream_to_file(response: requests.Response, dest: Path) -> None:
+    """
+    Vuelca el cuerpo de `response` (pedida con stream=True) a `dest`.
+
+    Se copia por bloques de CHUNK_SIZE sin cargar el archivo en memoria.
+    Se escribe sobre un temporal que se renombra al terminar, así una
+    descarga interrumpida no deja un archivo incompleto con el nombre final.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f"{dest.name}.part")
+    # Descomprime gzip/deflate si el servidor lo aplicó
+    response.raw.decode_content = True
+    try:
+        with open(tmp_path, "wb") as fh:
+            shutil.copyfileobj(response.raw, fh, CHUNK_SIZE)
+        tmp_path.replace(dest)
+    finally:
+        response.close()
+        tmp_path.unlink(missing_ok=True)
+
+
+def save_http_meta(dest: Path, response: requests.Response) -> None:
+    """Guarda ETag / Last-Modified de `response` tras escribir `dest`."""
+    meta = {
+        "url": response.url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    meta_path_for(dest).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def cached_download(
+    url: str,
+    dest: Path,
+    session: requests.Session | None = None,
+    **kwargs,
+) -> bool:
+    """
+    Descarga `url` en `dest` solo si cambió desde la última descarga.
+
+    Retorna True si se escribió el archivo y False si el servidor
+    respondió 304 (no se toca el archivo existente).
+    """
+    response = conditional_get(url, dest, session, stream=True, **kwargs)
+    if response is None:
+        return False
+
+    stream_to_file(response, dest)
+    save_http_meta(dest, response)
+    return True
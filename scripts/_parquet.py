@@ -0,0 +1,25 @@
+"""
+_parquet.py
+===========
+
+Opciones de escritura Parquet compartidas por los scripts del pipeline.
+
+Igual que _http.py, el prefijo "_" hace que run_pipeline.py no lo trate como
+un paso del pipeline; los scripts lo importan directamente
+(`from _parquet import PARQUET_OPTIONS`).
+
+PARQUET_OPTIONS se pasa tal cual a DataFrame.to_parquet(engine="pyarrow")
+o a pyarrow.parquet.write_table:
+    - zstd nivel 3: mejor compresión que snappy a velocidad similar
+    - diccionario para las columnas de texto de baja cardinalidad
+      (departamento, municipio, delito, genero, ...)
+    - row groups y páginas acotados para leer por partes
+"""
+
+PARQUET_OPTIONS = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 256_000,
+    "use_dictionary": True,
+    "data_page_size": 1 << 20,
+}